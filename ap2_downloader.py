@@ -4,14 +4,17 @@ Downloads PDF reports from AP2 website
 """
 
 import os
-import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from watchdog.events import PatternMatchingEventHandler
+import lxml.html
 
 import config
 
@@ -27,9 +30,19 @@ print(f"Target year: {config.TARGET_YEAR}")
 print(f"Download directory: {download_dir}")
 print(f"Website: {config.BASE_URL}")
 
+# Report link text -> REPORT_TYPES key, most specific first
+_REPORT_CLASSIFIERS = [
+    (re.compile(r'half', re.IGNORECASE), 'half_year'),  # Also 'Interim report, first half'
+    (re.compile(r'year[-\s]?end', re.IGNORECASE), 'year_end'),
+    (re.compile(r'annual', re.IGNORECASE), 'annual'),
+]
+
 
 def setup_driver():
     """Initialize Chrome driver"""
+    # Imported here so runs that never open a browser don't pay for selenium/uc
+    import undetected_chromedriver as uc
+
     print("\nSetting up Chrome driver...")
 
     options = uc.ChromeOptions()
@@ -39,94 +52,214 @@ def setup_driver():
         "download.directory_upgrade": True,
         "plugins.always_open_pdf_externally": True,
     }
+    if config.SELENIUM_CONFIG['block_images']:
+        prefs["profile.managed_default_content_settings.images"] = 2
+        options.add_argument('--blink-settings=imagesEnabled=false')
     options.add_experimental_option("prefs", prefs)
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--disable-extensions')
+
+    if config.SELENIUM_CONFIG['headless']:
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
 
-    driver = uc.Chrome(options=options)
-    driver.implicitly_wait(10)
+    # Persistent profile keeps the cookie consent and cached site assets between runs
+    driver = uc.Chrome(options=options, user_data_dir=config.CHROME_PROFILE_DIR)
+    driver.implicitly_wait(config.SELENIUM_CONFIG['implicit_wait'])
 
     print("OK Chrome driver ready")
     return driver
 
 
-def wait_for_download(initial_files, timeout=120):
-    """Wait for download to complete"""
-    start_time = time.time()
+_driver = None
+
+
+def get_driver():
+    """Return the shared Chrome driver, starting it on first use
+
+    Runs whose index and downloads are all served over plain HTTP never
+    need a browser, so it is only launched when required.
+    """
+    global _driver
+    if _driver is None:
+        _driver = setup_driver()
+        start_download_watcher()
+    return _driver
+
+
+def close_driver():
+    """Shut down the shared Chrome driver if it was started"""
+    global _driver
+    stop_download_watcher()
+    if _driver is None:
+        return
+
+    try:
+        _driver.close()  # Close current window first
+        _driver.quit()   # Then quit entire driver
+    except Exception:
+        # Ignore errors on cleanup
+        pass
+    _driver = None
+
+
+class DownloadCompleteHandler(PatternMatchingEventHandler):
+    """Signals when a finished PDF appears in the download folder
+
+    Chrome writes to name.pdf.crdownload and renames it to name.pdf once the
+    download is complete, so a created/moved event for a *.pdf is the
+    completion signal - partial files are filtered out by pattern.
+    """
+
+    def __init__(self):
+        super().__init__(
+            patterns=["*.pdf"],
+            ignore_patterns=["*.crdownload", "*.tmp", "*.part"],
+            ignore_directories=True,
+        )
+        self.initial_files = set()
+        self.file_path = None
+        self.done = threading.Event()
+
+    def expect(self, initial_files):
+        """Arm the handler for the next download - files already present are ignored"""
+        self.initial_files = initial_files
+        self.file_path = None
+        self.done.clear()
+
+    def check(self, path):
+        if os.path.basename(path) in self.initial_files:
+            return
+
+        self.file_path = path
+        self.done.set()
+
+    def on_created(self, event):
+        self.check(event.src_path)
+
+    def on_moved(self, event):
+        self.check(event.dest_path)
+
 
-    while time.time() - start_time < timeout:
-        current_files = set(os.listdir(download_dir))
-        new_files = current_files - initial_files
-        complete_files = {f for f in new_files if not f.endswith((".crdownload", ".tmp", ".part"))}
+# One observer watches the download folder for as long as the browser runs
+_download_handler = None
+_observer = None
 
-        if complete_files:
-            new_file = list(complete_files)[0]
-            file_path = os.path.join(download_dir, new_file)
 
-            # Check file stability
-            time.sleep(1)
-            size1 = os.path.getsize(file_path)
-            time.sleep(2)
-            size2 = os.path.getsize(file_path)
+def start_download_watcher():
+    """Start watching the download folder for completed browser downloads"""
+    global _download_handler, _observer
+    if _observer is not None:
+        return
 
-            if size1 == size2 and size2 > 0:
-                print(f"  OK Downloaded: {new_file} ({size2 / 1024:.1f} KB)")
-                return file_path
+    from watchdog.observers import Observer  # Platform backend (inotify etc.) - only needed with a browser
 
-        time.sleep(1)
+    _download_handler = DownloadCompleteHandler()
+    _observer = Observer()
+    _observer.schedule(_download_handler, download_dir, recursive=False)
+    _observer.start()
+
+
+def stop_download_watcher():
+    """Stop the download folder observer if it was started"""
+    global _download_handler, _observer
+    if _observer is None:
+        return
+
+    _observer.stop()
+    _observer.join()
+    _download_handler = None
+    _observer = None
+
+
+def wait_for_download(timeout=120):
+    """Wait for the download armed with DownloadCompleteHandler.expect() to complete"""
+    if _download_handler.done.wait(timeout):
+        file_path = _download_handler.file_path
+        print(f"  OK Downloaded: {os.path.basename(file_path)} ({os.path.getsize(file_path) / 1024:.1f} KB)")
+        return file_path
 
     raise TimeoutError(f"Download timeout after {timeout}s")
 
 
+def classify_report_type(report_name):
+    """Map a report link's text to a REPORT_TYPES key (defaults to annual)"""
+    for pattern, report_type in _REPORT_CLASSIFIERS:
+        if pattern.search(report_name):
+            return report_type
+    return 'annual'
+
+
 def parse_reports_page(driver):
     """Parse the financial reports page"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
     print(f"\nNavigating to {config.BASE_URL}...")
     driver.get(config.BASE_URL)
-    time.sleep(3)
 
-    # Accept cookies
+    # Wait for the year headings rather than a fixed pause - returns as soon as they render
     try:
-        accept_btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(@class,'cmplz-accept')]" ))
+        WebDriverWait(driver, config.SELENIUM_CONFIG['page_load_timeout']).until(
+            EC.presence_of_element_located(
+                (By.XPATH, "//div[contains(@class,'content')]//h2[contains(@class,'wp-block-heading')]")
+            )
         )
+    except TimeoutException:
+        print("WARNING: Report headings did not appear, parsing page as loaded")
+
+    # Accept cookies - usually already accepted in the persistent profile, so don't wait long
+    cookie_button = (By.XPATH, "//button[contains(@class,'cmplz-accept')]")
+    try:
+        accept_btn = WebDriverWait(driver, 1).until(EC.element_to_be_clickable(cookie_button))
         accept_btn.click()
         print("OK Accepted cookies")
-        time.sleep(2)
+        WebDriverWait(driver, 5).until(EC.invisibility_of_element_located(cookie_button))
     except:
         pass
 
-    # Parse page
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-    content_div = soup.find('div', class_='content')
+    return parse_reports_html(driver.page_source)
+
 
-    if not content_div:
+def parse_reports_html(html):
+    """Extract report links from the reports page HTML"""
+    # Parse page - year headings and PDF links in document order
+    root = lxml.html.fromstring(html)
+    root.make_links_absolute(config.BASE_URL)
+    content_divs = root.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]")
+
+    if not content_divs:
         print("ERROR: Could not find content div")
         return []
 
     reports = []
     current_year = None
 
-    for element in content_div.find_all(['h2', 'div', 'p']):
+    for element in content_divs[0].xpath(
+        ".//h2[contains(concat(' ', normalize-space(@class), ' '), ' wp-block-heading ')]"
+        " | .//a[substring(@href, string-length(@href) - 3) = '.pdf']"
+    ):
         # Check for year header
-        if element.name == 'h2' and element.get('class') and 'wp-block-heading' in element.get('class'):
+        if element.tag == 'h2':
             try:
-                current_year = int(element.text.strip())
-            except:
-                continue
+                current_year = int(element.text_content().strip())
+            except ValueError:
+                pass
+            continue
 
-        # Check for report links
+        # Report link
         if current_year:
-            links = element.find_all('a', href=True)
-            for link in links:
-                href = link.get('href')
-                if href and href.endswith('.pdf'):
-                    report_name = link.text.strip()
-                    report_type = 'half_year' if 'half' in report_name.lower() else 'annual'
-
-                    reports.append({
-                        'year': current_year,
-                        'name': report_name,
-                        'url': href,
-                        'type': report_type
-                    })
+            report_name = element.text_content().strip()
+            report_type = classify_report_type(report_name)
+
+            reports.append({
+                'year': current_year,
+                'name': report_name,
+                'url': element.get('href'),
+                'type': report_type
+            })
 
     # Deduplicate by URL (same report may appear multiple times on page)
     seen_urls = set()
@@ -140,6 +273,70 @@ def parse_reports_page(driver):
     return unique_reports
 
 
+def fetch_reports_page_static():
+    """Fetch the reports page over plain HTTP
+
+    The year headings and PDF links are server-rendered, so a single GET
+    is enough when the site doesn't demand a real browser.
+    """
+    print(f"\nFetching {config.BASE_URL}...")
+    response = requests.get(
+        config.BASE_URL,
+        headers={'User-Agent': config.DOWNLOAD_CONFIG['user_agent']},
+        timeout=config.DOWNLOAD_CONFIG['request_timeout']
+    )
+    response.raise_for_status()
+    return parse_reports_html(response.text)
+
+
+def scrape_reports_index():
+    """Scrape the reports index, using the browser only if plain HTTP fails"""
+    if config.DOWNLOAD_CONFIG['static_index']:
+        try:
+            reports = fetch_reports_page_static()
+            if reports:
+                return reports
+            print("WARNING: No reports in static page, falling back to the browser")
+        except requests.RequestException as e:
+            print(f"WARNING: Static fetch failed ({e}), falling back to the browser")
+
+    return parse_reports_page(get_driver())
+
+
+def reports_cache_path():
+    """Cache file for the reports index - keyed by URL so a new BASE_URL starts fresh"""
+    url_hash = hashlib.sha256(config.BASE_URL.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(config.CACHE_DIR, f"reports_index_{url_hash}.json")
+
+
+def load_reports_cache():
+    """Load the cached reports index, or None if it is missing or expired"""
+    try:
+        with open(reports_cache_path(), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        fetched_at = datetime.fromisoformat(cached['fetched_at'])
+        reports = cached['reports']
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if datetime.now() - fetched_at > timedelta(hours=config.DOWNLOAD_CONFIG['index_cache_ttl_hours']):
+        return None
+
+    print(f"\nOK Using cached reports index from {fetched_at:%Y-%m-%d %H:%M} ({len(reports)} reports)")
+    return reports
+
+
+def save_reports_cache(reports):
+    """Save the parsed reports index for later runs"""
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    with open(reports_cache_path(), 'w', encoding='utf-8') as f:
+        json.dump({
+            'fetched_at': datetime.now().isoformat(),
+            'url': config.BASE_URL,
+            'reports': reports,
+        }, f, indent=2)
+
+
 def filter_reports(all_reports):
     """Filter reports based on config"""
     # Determine target year
@@ -166,32 +363,128 @@ def filter_reports(all_reports):
     return filtered
 
 
-def download_reports(driver, reports):
+def report_filename(report):
+    """Build the local filename for a report"""
+    return f"AP2_{report['year']}_{report['type']}.pdf"
+
+
+def create_http_session(pool_size):
+    """Build a pooled HTTP session that carries the browser's identity
+
+    All reports are served from the same host, so the workers share
+    keep-alive connections instead of each paying for a new TLS handshake.
+    Without a running browser the configured User-Agent is used.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=config.DOWNLOAD_CONFIG['max_retries'],
+        backoff_factor=config.DOWNLOAD_CONFIG['retry_backoff'],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    session.headers['User-Agent'] = config.DOWNLOAD_CONFIG['user_agent']
+
+    # Reuse the browser session's identity so direct requests are treated the same
+    if _driver is not None:
+        session.headers['User-Agent'] = _driver.execute_script("return navigator.userAgent")
+        for cookie in _driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
+
+    return session
+
+
+def download_report_http(session, report):
+    """Download a single report directly over HTTP, bypassing the browser
+
+    The body is streamed to disk in chunks rather than held in memory, and
+    written to a .part file that is only renamed once complete.
+    """
+    new_path = os.path.join(download_dir, report_filename(report))
+    part_path = new_path + '.part'
+
+    with session.get(report['url'], stream=True, timeout=config.DOWNLOAD_CONFIG['request_timeout']) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=config.DOWNLOAD_CONFIG['chunk_size'])
+
+        # Bot protection may answer with an HTML page instead of the PDF
+        first_chunk = next(chunks, b'')
+        if not first_chunk.startswith(b'%PDF'):
+            raise ValueError(f"Response is not a PDF ({response.headers.get('Content-Type')})")
+
+        try:
+            with open(part_path, 'wb') as f:
+                f.write(first_chunk)
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(part_path, new_path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    print(f"  OK Downloaded: {os.path.basename(new_path)} ({os.path.getsize(new_path) / 1024:.1f} KB)")
+    return new_path
+
+
+def download_report_browser(driver, report):
+    """Download a single report through Chrome (fallback path)"""
+    with os.scandir(download_dir) as entries:
+        initial_files = {entry.name for entry in entries}
+
+    # Arm before navigating so a fast download can't complete unseen
+    _download_handler.expect(initial_files)
+    driver.get(report['url'])
+    downloaded_file = wait_for_download()
+
+    # Rename with year and type
+    new_path = os.path.join(download_dir, report_filename(report))
+
+    if os.path.exists(new_path):
+        os.remove(new_path)
+    os.rename(downloaded_file, new_path)
+
+    return new_path
+
+
+def download_reports(reports):
     """Download all filtered reports"""
     print(f"\n{'='*80}")
     print("DOWNLOADING REPORTS")
     print(f"{'='*80}")
 
     downloaded = []
+    failed = []
+
+    # Reports sharing a target filename (duplicate links, or two reports of one
+    # type in a year) would stream into the same .part file at once; keep the
+    # last, which is the file the one-at-a-time loop used to leave on disk
+    by_filename = {report_filename(report): report for report in reports}
+    if len(by_filename) < len(reports):
+        print(f"  Skipping {len(reports) - len(by_filename)} report(s) with a duplicate year and type")
+        reports = list(by_filename.values())
+
+    max_workers = min(config.DOWNLOAD_CONFIG['max_workers'], len(reports))
+    with create_http_session(max_workers) as session, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(download_report_http, session, report) for report in reports]
+
+        for report, future in zip(reports, futures):
+            try:
+                downloaded.append(future.result())
+            except Exception as e:
+                print(f"  WARNING: Direct download failed for {report['name']}: {e}")
+                failed.append(report)
 
-    for i, report in enumerate(reports, 1):
-        print(f"\n[{i}/{len(reports)}] {report['name']}...")
+    # Fall back to the browser for anything the direct download couldn't fetch
+    for i, report in enumerate(failed, 1):
+        print(f"\n[{i}/{len(failed)}] {report['name']} (browser)...")
 
         try:
-            initial_files = set(os.listdir(download_dir))
-            driver.get(report['url'])
-            downloaded_file = wait_for_download(initial_files)
-
-            # Rename with year and type
-            new_name = f"AP2_{report['year']}_{report['type']}.pdf"
-            new_path = os.path.join(download_dir, new_name)
-
-            if os.path.exists(new_path):
-                os.remove(new_path)
-            os.rename(downloaded_file, new_path)
-
-            downloaded.append(new_path)
-            time.sleep(2)
+            downloaded.append(download_report_browser(get_driver(), report))
 
         except Exception as e:
             print(f"  FAILED Failed: {e}")
@@ -201,11 +494,17 @@ def download_reports(driver, reports):
 
 def main():
     """Main execution"""
-    driver = None
-
     try:
-        driver = setup_driver()
-        all_reports = parse_reports_page(driver)
+        # Past years' reports never change, so a fresh cached index skips the browser entirely
+        all_reports = None
+        if config.TARGET_YEAR != "latest":
+            all_reports = load_reports_cache()
+
+        if all_reports is None:
+            all_reports = scrape_reports_index()
+            if all_reports:
+                save_reports_cache(all_reports)
+
         reports_to_download = filter_reports(all_reports)
 
         if not reports_to_download:
@@ -213,7 +512,7 @@ def main():
             print("Check config.py TARGET_YEAR and REPORT_TYPES settings")
             return
 
-        downloaded = download_reports(driver, reports_to_download)
+        downloaded = download_reports(reports_to_download)
 
         print(f"\n{'='*80}")
         print("SCRAPER COMPLETED")
@@ -229,13 +528,7 @@ def main():
         raise
 
     finally:
-        if driver:
-            try:
-                driver.close()  # Close current window first
-                driver.quit()   # Then quit entire driver
-            except Exception as e:
-                # Ignore errors on cleanup
-                pass
+        close_driver()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""Memoized camelot.read_pdf shared by the debug scripts"""
+from functools import lru_cache
+
+import camelot
+
+
+@lru_cache(maxsize=128)
+def read_pdf_cached(path, pages, flavor='lattice', **kwargs):
+    """camelot.read_pdf cached on its arguments
+
+    Arguments must be hashable - pass pages as a string, e.g. '6'.
+    The returned TableList is shared between callers, so don't modify it.
+    """
+    return camelot.read_pdf(path, pages=pages, flavor=flavor, **kwargs)
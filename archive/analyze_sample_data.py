@@ -1,9 +1,10 @@
 """Analyze sample data to understand expected structure"""
+import sys
 import pandas as pd
 
 # Read sample file
 sample_file = r"project information\AP2_SA_SWEPENFND_DATA_20220920.xlsx"
-df = pd.read_excel(sample_file, header=1)
+df = pd.read_excel(sample_file, header=1, engine='calamine')
 
 print("=" * 80)
 print("SAMPLE DATA ANALYSIS")
@@ -35,7 +36,7 @@ for i, col in enumerate(df.columns):
 print("\n" + "=" * 80)
 print("ACTUAL DATA ROWS")
 print("=" * 80)
-print(df.to_string())
+df.to_csv(sys.stdout, sep='\t', index=False)  # Plain rows - skips to_string's column alignment
 
 # Now check our output
 print("\n" + "=" * 80)
@@ -43,13 +44,13 @@ print("COMPARING WITH OUR OUTPUT")
 print("=" * 80)
 
 our_file = r"output\latest\AP2_Financial_Data_latest.xlsx"
-our_df = pd.read_excel(our_file)
+our_df = pd.read_excel(our_file, engine='calamine')
 
 print(f"\nOur output shape: {our_df.shape}")
 print(f"Sample shape: {df.shape}")
 
 print("\nOur data:")
-print(our_df.to_string())
+our_df.to_csv(sys.stdout, sep='\t', index=False)
 
 # Compare column by column
 print("\n" + "=" * 80)
@@ -1,15 +1,29 @@
-import openpyxl
+from python_calamine import CalamineWorkbook
 
-our = openpyxl.load_workbook('output/latest/AP2_Financial_Data_latest.xlsx')
-sample = openpyxl.load_workbook('project information/AP2_SA_SWEPENFND_DATA_20220920.xlsx')
 
-print('Our Row 1, Cell 1:', repr(our.active.cell(1,1).value))
-print('Sample Row 1, Cell 1:', repr(sample.active.cell(1,1).value))
+def read_rows(path):
+    """First sheet as a list of rows (0-indexed; empty cells are '')"""
+    return CalamineWorkbook.from_path(path).get_sheet_by_index(0).to_python()
+
+
+def cell(rows, row, col):
+    """1-indexed cell lookup, like openpyxl's ws.cell(row, col).value"""
+    try:
+        return rows[row - 1][col - 1]
+    except IndexError:
+        return ''
+
+
+our = read_rows('output/latest/AP2_Financial_Data_latest.xlsx')
+sample = read_rows('project information/AP2_SA_SWEPENFND_DATA_20220920.xlsx')
+
+print('Our Row 1, Cell 1:', repr(cell(our, 1, 1)))
+print('Sample Row 1, Cell 1:', repr(cell(sample, 1, 1)))
 
 print('\nFull Row 1 comparison:')
 for i in range(1, 22):
-    our_val = our.active.cell(1,i).value
-    sample_val = sample.active.cell(1,i).value
+    our_val = cell(our, 1, i)
+    sample_val = cell(sample, 1, i)
     match = our_val == sample_val
     if not match:
         print(f'  Col {i}: MISMATCH')
@@ -18,6 +32,6 @@ for i in range(1, 22):
 
 print('\nRow 2 comparison (first 5):')
 for i in range(1, 6):
-    our_val = our.active.cell(2,i).value
-    sample_val = sample.active.cell(2,i).value
+    our_val = cell(our, 2, i)
+    sample_val = cell(sample, 2, i)
     print(f'  Col {i}: Match={our_val == sample_val}')
@@ -1,5 +1,5 @@
 """Debug pattern matching for missing fields"""
-import camelot
+from _camelot_cache import read_pdf_cached
 import pandas as pd
 import re
 
@@ -7,7 +7,7 @@ pdf_path = r"downloads\20251107_104414\AP2_2025_half_year.pdf"
 page_num = 6
 
 # Extract with Camelot
-tables = camelot.read_pdf(pdf_path, pages=str(page_num), flavor='lattice')
+tables = read_pdf_cached(pdf_path, str(page_num), 'lattice')
 df = tables[1].df  # Table 2 (balance sheet)
 
 print("=" * 80)
@@ -23,6 +23,18 @@ missing_fields = {
     'TOTAL FUND CAPITAL AND LIABILITIES': [r'total fund capital and liabilities', r'total.*capital.*liabilities']
 }
 
+# One alternation over every pattern - most rows match nothing, and those are
+# rejected with a single search instead of one per field and pattern
+any_field = re.compile(
+    '|'.join(f'(?:{pattern})' for patterns in missing_fields.values() for pattern in patterns),
+    re.IGNORECASE
+)
+
+missing_fields = {
+    field_key: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for field_key, patterns in missing_fields.items()
+}
+
 print("\nAll rows in balance sheet table:\n")
 for idx, row in df.iterrows():
     field_name = str(row.iloc[0]).strip()
@@ -30,10 +42,13 @@ for idx, row in df.iterrows():
 
     print(f"Row {idx:2d}: '{field_name}' = '{value}'")
 
-    # Check against missing fields
+    if not any_field.search(field_name):
+        continue
+
+    # Report every field/pattern that matches, so overlapping patterns show up
     for field_key, patterns in missing_fields.items():
         for pattern in patterns:
-            if re.search(pattern, field_name, re.IGNORECASE):
-                print(f"        [MATCH] {field_key} with pattern: {pattern}")
+            if pattern.search(field_name):
+                print(f"        [MATCH] {field_key} with pattern: {pattern.pattern}")
 
 print("\n" + "=" * 80)
@@ -1,5 +1,5 @@
 """Debug script to visualize extracted table structure"""
-import camelot
+from _camelot_cache import read_pdf_cached
 import pandas as pd
 
 pdf_path = r"downloads\20251107_104414\AP2_2025_half_year.pdf"
@@ -10,7 +10,7 @@ print("Extracting table from Balance Sheet page...")
 print("=" * 80)
 
 # Extract with Camelot
-tables = camelot.read_pdf(pdf_path, pages=str(page_num), flavor='lattice')
+tables = read_pdf_cached(pdf_path, str(page_num), 'lattice')
 
 print(f"\nFound {len(tables)} table(s)\n")
 
@@ -1,24 +1,25 @@
 """Debug script to see what tables are extracted from PDF"""
 
-import pdfplumber
-import glob
+import fitz  # PyMuPDF
 import os
 
-# Find latest PDF
-pdf_folders = glob.glob('downloads/*')
+# Find latest PDF - scandir entries carry their stat results, so each folder is stat'd once
+with os.scandir('downloads') as entries:
+    pdf_folders = [entry for entry in entries if entry.is_dir()]
 if pdf_folders:
-    latest_folder = max(pdf_folders, key=os.path.getmtime)
-    pdf_files = glob.glob(os.path.join(latest_folder, '*.pdf'))
+    latest_folder = max(pdf_folders, key=lambda entry: entry.stat().st_mtime).path
+    with os.scandir(latest_folder) as entries:
+        pdf_files = [entry.path for entry in entries if entry.name.endswith('.pdf') and entry.is_file()]
 
     if pdf_files:
         pdf_file = pdf_files[0]
         print(f"Analyzing: {pdf_file}\n")
 
-        with pdfplumber.open(pdf_file) as pdf:
-            print(f"Total pages: {len(pdf.pages)}\n")
+        with fitz.open(pdf_file) as doc:
+            print(f"Total pages: {doc.page_count}\n")
 
-            for page_num, page in enumerate(pdf.pages[:10], 1):  # First 10 pages
-                tables = page.extract_tables()
+            for page_num, page in enumerate(doc.pages(0, min(10, doc.page_count)), 1):  # First 10 pages
+                tables = [table.extract() for table in page.find_tables().tables]
 
                 if tables:
                     print(f"=" * 80)
@@ -1,37 +1,39 @@
 """Find Key Ratios data in PDF"""
-import camelot
+import sys
+from _camelot_cache import read_pdf_cached
 import fitz
 
 pdf_path = r"downloads\20251107_163821\AP2_2023_half_year.pdf"
+FIRST_ONLY = True  # Stop at the first Key Ratios page; set False to inspect every match
 
 print("=" * 80)
 print("SEARCHING FOR KEY RATIOS PAGE")
 print("=" * 80)
 
-# Search all pages for "Key ratios"
-doc = fitz.open(pdf_path)
-for page_num in range(len(doc)):
-    page = doc[page_num]
-    text = page.get_text().lower()
-
-    if 'key ratios' in text or 'key ratio' in text:
-        print(f"\nPage {page_num + 1}: Found 'Key ratios'")
-
-        # Extract tables from this page
-        tables = camelot.read_pdf(pdf_path, pages=str(page_num + 1), flavor='lattice')
-
-        if len(tables) == 0:
-            print("  Lattice mode found no tables, trying stream mode...")
-            tables = camelot.read_pdf(pdf_path, pages=str(page_num + 1), flavor='stream', edge_tol=50, row_tol=10)
-
-        if len(tables) > 0:
-            print(f"  Found {len(tables)} table(s)")
-
-            for i, table in enumerate(tables):
-                df = table.df
-                print(f"\n  Table {i+1} (shape: {df.shape}):")
-                print(df.head(10).to_string())
-                print("\n  Full table:")
-                print(df.to_string())
-
-doc.close()
+# Search pages for "Key ratios" - the file is closed even if a print fails
+with fitz.open(pdf_path) as doc:
+    for page_num in range(len(doc)):
+        # search_for is case-insensitive and works on the page's text layer directly,
+        # without building and lowercasing the whole page text ('key ratio' also covers 'key ratios')
+        if doc[page_num].search_for('key ratio'):
+            print(f"\nPage {page_num + 1}: Found 'Key ratios'")
+
+            # Extract tables from this page
+            tables = read_pdf_cached(pdf_path, str(page_num + 1), 'lattice')
+
+            if len(tables) == 0:
+                print("  Lattice mode found no tables, trying stream mode...")
+                tables = read_pdf_cached(pdf_path, str(page_num + 1), 'stream', edge_tol=50, row_tol=10)
+
+            if len(tables) > 0:
+                print(f"  Found {len(tables)} table(s)")
+
+                for i, table in enumerate(tables):
+                    df = table.df
+                    print(f"\n  Table {i+1} (shape: {df.shape}):")
+                    print(df.head(10).to_string())
+                    print("\n  Full table:")
+                    df.to_csv(sys.stdout, sep='\t', index=False)
+
+            if FIRST_ONLY:
+                break
@@ -5,129 +5,280 @@ Works across all PDF structure variations (2020-2025+) without hardcoding
 """
 
 import os
-import glob
+import logging
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import pdfplumber
+import fitz  # PyMuPDF
 from datetime import datetime
 import re
 
 import config
+from parser_common import (
+    extract_year_from_filename, find_latest_download_folder, link_latest, list_pdf_files, parse_with_cache
+)
+
+# Progress goes to stdout via print; failures are logged with their traceback
+logger = logging.getLogger(__name__)
+
+# First number on a line:
+#   - an optional minus sign (-)
+#   - followed by 1 to 3 digits (\d{1,3})
+#   - optionally followed by groups of (space followed by 3 digits) (?:[ \xa0]\d{3})*
+# Only a plain or non-breaking space groups thousands; columns are
+# tab-separated by extract_page_rows, so "184 676\t178 237" yields 184676
+# rather than running on into the comparison-year column.
+_LINE_NUM = re.compile(r'(-?\d{1,3}(?:[ \xa0]\d{3})*)')
+
+# Thousands separators and non-breaking spaces stripped from numbers in one pass
+_NUMBER_DELCHARS = str.maketrans('', '', ' ,\xa0')
+
+# The assets side starts at a line reading just "Assets"; anything above it
+# (an income statement sharing the page) has look-alike labels such as
+# "Net result, derivative instruments"
+_ASSETS_HEADING_RE = re.compile(r'^\s*assets\s*$', re.IGNORECASE | re.MULTILINE)
+
+# The liabilities side of the balance sheet starts at the first line opening
+# with "Liabilities" or "Fund capital" (e.g. "FUND CAPITAL AND LIABILITIES")
+_LIABILITIES_HEADING_RE = re.compile(r'^\s*(?:liabilities|fund capital)\b', re.IGNORECASE | re.MULTILINE)
+
+# Cached extraction results, kept apart from the enhanced parser's cache since
+# the two parsers don't produce identical results
+PARSE_CACHE_DIR = os.path.join(config.CACHE_DIR, 'archive_parser')
+
+# Bump when extraction logic changes, so cached parse results are not reused
+PARSER_VERSION = "v1"
+
+# Upper bound on parser processes - a handful of PDFs gains nothing from more
+MAX_PARSE_WORKERS = 4
+
+# Words whose vertical midpoints are within this many points share a row
+ROW_TOLERANCE = 3
+
+# Horizontal gaps wider than this many points separate columns, not words
+COLUMN_GAP = 5
+
+# Balance sheet page indicators: (keywords that must all appear, points)
+PAGE_KEYWORD_SCORES = (
+    (('balance sheet',), 20),
+    (('sek million',), 10),
+    (('assets',), 5),
+    (('liabilities',), 5),
+    (('total assets',), 15),
+    (('fund capital',), 10),
+    (('listed', 'unlisted'), 15),
+    # Penalize pages that are just summaries
+    (('key ratios',), -10),
+    (('performance review',), -10),
+)
+
+# A page scoring this high (out of 80) is taken as the balance sheet without
+# scanning the remaining pages
+CONFIDENT_PAGE_SCORE = 50
+
+# Fields read from the assets side; everything else is on the liabilities side
+ASSET_FIELDS = {
+    'EQUITIESANDPARTICIPATIONSLISTED',
+    'EQUITIESANDPARTICIPATIONSUNLISTED',
+    'BONDSANDOTHERFIXEDINCOMESECURITIES',
+    'DERIVATIVEINSTRUMENTS',
+    'CASHANDBANKBALANCES',
+    'OTHERASSETS',
+    'PREPAIDEXPENSESANDACCRUEDINCOME',
+    'TOTALASSETS',
+}
+
+# Comprehensive field patterns - handles all year variations
+FIELD_PATTERN_SOURCES = {
+    'EQUITIESANDPARTICIPATIONSLISTED': [r'Listed'],
+    'EQUITIESANDPARTICIPATIONSUNLISTED': [r'Unlisted', r'Non-listed'],
+    'BONDSANDOTHERFIXEDINCOMESECURITIES': [r'Bonds and other fixed-income securities'],
+    'DERIVATIVEINSTRUMENTS': [r'Derivative instruments'],
+    'CASHANDBANKBALANCES': [r'Cash and bank balances'],
+    'OTHERASSETS': [r'Other assets'],
+    'PREPAIDEXPENSESANDACCRUEDINCOME': [r'Prepaid expenses and accrued income'],
+    'TOTALASSETS': [r'TOTAL ASSETS'],
+    'DERIVATIVEINSTRUMENTSLIABILITIES': [r'Derivative instruments'],
+    'OTHERLIABILITIES': [r'Other liabilities'],
+    'DEFERREDINCOMEANDACCRUEDEXPENSES': [r'Deferred income and accrued expenses'],
+    'TOTALLIABILITIES': [r'Total liabilities'],
+    'FUNDCAPITALCARRIEDFORWARD': [r'Fund capital carried forward'],
+    'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM': [r'Net payments to the national pension system'],
+    'NETRESULTFORTHEPERIOD': [r'Net result for the period'],
+    'TOTALFUNDCAPITAL': [r'Total Fund capital'],
+    'TOTALFUNDCAPITALANDLIABILITIES': [r'TOTAL FUND CAPITAL AND LIABILITIES'],
+}
+
+
+
+def compile_field_scanner(field_names):
+    """Combine the given fields' patterns into one alternation
+
+    Returns:
+        Tuple of (compiled pattern, group name -> field name). Longer labels
+        come first so that, at the same position, 'TOTAL FUND CAPITAL AND
+        LIABILITIES' wins over its prefix 'Total Fund capital'.
+    """
+    alternatives = sorted(
+        ((pattern, field_name) for field_name in field_names for pattern in FIELD_PATTERN_SOURCES[field_name]),
+        key=lambda alternative: len(alternative[0]),
+        reverse=True
+    )
+    group_fields = {f'g{i}': field_name for i, (_, field_name) in enumerate(alternatives)}
+    combined = '|'.join(f'(?P<g{i}>{pattern})' for i, (pattern, _) in enumerate(alternatives))
+    return re.compile(combined, re.IGNORECASE), group_fields
 
-print("=" * 80)
-print("AP2 PDF Parser - Adaptive Version")
-print("=" * 80)
-
-
-def find_latest_download_folder():
-    """Find the most recent download folder"""
-    download_folders = glob.glob('downloads/*')
-    if not download_folders:
-        print("ERROR: No download folders found")
-        return None
 
-    latest_folder = max(download_folders, key=os.path.getmtime)
-    print(f"Processing folder: {latest_folder}")
-    return latest_folder
+# One scanner per balance sheet section, compiled once at import. Without a
+# liabilities heading the whole page is scanned for every field except the
+# liabilities-side derivatives, which can't be told apart from the asset line.
+ASSETS_SCANNER = compile_field_scanner([f for f in FIELD_PATTERN_SOURCES if f in ASSET_FIELDS])
+LIABILITIES_SCANNER = compile_field_scanner([f for f in FIELD_PATTERN_SOURCES if f not in ASSET_FIELDS])
+UNSPLIT_SCANNER = compile_field_scanner([f for f in FIELD_PATTERN_SOURCES if f != 'DERIVATIVEINSTRUMENTSLIABILITIES'])
 
 
 def extract_first_value(line):
     """Extract ONLY the first value from financial lines like 'Listed 184 676 178 237 181 961'
     Returns only the current period value (184676 in this example)
     """
-    # Find all sequences of numbers (potentially with spaces as thousand separators)
-    # This regex looks for:
-    #   - an optional minus sign (-)
-    #   - followed by 1 to 3 digits (\\d{1,3})
-    #   - optionally followed by groups of (space followed by 3 digits) (?:\\s\\d{3}))*
-    # This will capture each number group separately.
-    all_numbers_in_line = re.findall(r'(-?\\d{1,3}(?:\\s\\d{3})*)', line)
-    
-    if all_numbers_in_line:
-        # We are interested in the first of the *financial* numbers.
-        # The `smart_field_extraction` already passes a substring starting from the keyword.
-        # So, the first number found in this substring should be the one we want.
-        try:
-            num_str = all_numbers_in_line[0]
-            cleaned = num_str.replace(' ', '').replace(',', '').strip()
-            return int(cleaned)
-        except ValueError:
-            return None
-            
-    return None
+    # The `smart_field_extraction` already passes a substring starting from the keyword,
+    # so the first number found in this substring is the one we want - stop there
+    # instead of collecting every number on the line.
+    match = _LINE_NUM.search(line)
+    if not match:
+        return None
+
+    # int() handles the leading minus sign itself
+    return int(match.group(1).translate(_NUMBER_DELCHARS))
+
+
+def extract_page_rows(page):
+    """Page text with one line per visual row, like pdfplumber's extract_text
+
+    PyMuPDF emits each table cell as its own line, which separates labels
+    from their values; words are regrouped by vertical position instead.
+    Word boxes come in unrotated page coordinates, so on a rotated page
+    (landscape balance sheets) they are mapped to the displayed orientation
+    first.
+    """
+    rows = []
+    current_row = []
+    current_mid = None
+
+    words = page.get_text("words")
+    if page.rotation:
+        matrix = page.rotation_matrix
+        words = [(*(fitz.Rect(word[:4]) * matrix), *word[4:]) for word in words]
+
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        mid = (word[1] + word[3]) / 2
+        if current_mid is not None and mid - current_mid > ROW_TOLERANCE:
+            rows.append(current_row)
+            current_row = []
+        if not current_row:
+            current_mid = mid
+        current_row.append(word)
+
+    if current_row:
+        rows.append(current_row)
+
+    return '\n'.join(join_row_words(sorted(row, key=lambda w: w[0])) for row in rows)
 
 
-def find_balance_sheet_page(pdf):
-    """Dynamically find the balance sheet page - no hardcoding"""
+def join_row_words(words):
+    """Join a row's words left to right, with a tab between table columns"""
+    parts = [words[0][4]]
+    for prev, word in zip(words, words[1:]):
+        parts.append('\t' if word[0] - prev[2] > COLUMN_GAP else ' ')
+        parts.append(word[4])
+    return ''.join(parts)
+
+
+def find_balance_sheet_page(doc):
+    """Dynamically find the balance sheet page - no hardcoding
+
+    Pages are scored on PyMuPDF's plain text; only the chosen page is
+    rebuilt into rows for field extraction.
+    """
     best_page = None
     best_score = 0
     
-    for page_num, page in enumerate(pdf.pages, 1):
-        text = page.extract_text()
-        if not text:
+    for page_num, page in enumerate(doc, 1):
+        text = page.get_text()
+        if not text.strip():
             continue
             
         score = 0
         text_lower = text.lower()
         
-        # Score page based on balance sheet indicators
-        if 'balance sheet' in text_lower: score += 20
-        if 'sek million' in text_lower: score += 10
-        if 'assets' in text_lower: score += 5
-        if 'liabilities' in text_lower: score += 5
-        if 'total assets' in text_lower: score += 15
-        if 'fund capital' in text_lower: score += 10
-        if 'listed' in text_lower and 'unlisted' in text_lower: score += 15
-        
-        # Penalize pages that are just summaries
-        if 'key ratios' in text_lower: score -= 10
-        if 'performance review' in text_lower: score -= 10
-        
+        for keywords, points in PAGE_KEYWORD_SCORES:
+            if all(keyword in text_lower for keyword in keywords):
+                score += points
+
+        # Stop extracting text as soon as a page is clearly the balance sheet
+        if score >= CONFIDENT_PAGE_SCORE:
+            return page_num, page, extract_page_rows(page)
+
         if score > best_score:
             best_score = score
-            best_page = (page_num, page, text)
+            best_page = (page_num, page)
     
     if best_page and best_score >= 20:  # Minimum confidence threshold
-        return best_page
+        page_num, page = best_page
+        return page_num, page, extract_page_rows(page)
     return None, None, None
 
 
-def smart_field_extraction(text, field_name, patterns):
-    """Smart extraction that handles context and position"""
-    lines = text.split('\n')
-    
-    # Context tracking for better accuracy
-    in_assets_section = False
-    in_liabilities_section = False
-    
-    for i, line in enumerate(lines):
+def split_balance_sheet_sections(text):
+    """Split page text into the assets and liabilities sides
+
+    The assets side runs from the "Assets" heading (or the top of the page
+    when there is none) to the first liabilities heading.
+
+    Returns:
+        Tuple of (assets_text, liabilities_text); liabilities_text is None
+        when the page has no liabilities heading
+    """
+    assets_heading = _ASSETS_HEADING_RE.search(text)
+    if assets_heading:
+        text = text[assets_heading.end():]
+
+    parts = _LIABILITIES_HEADING_RE.split(text, maxsplit=1)
+    if len(parts) == 1:
+        return text, None
+    return parts[0], parts[1]
+
+
+def smart_field_extraction(text, scanner):
+    """Smart extraction that handles position - one regex scan per line for all fields
+
+    Each line is routed to the field whose label matches first; the first
+    line yielding a value wins for that field.
+
+    Returns:
+        Dict of field name -> current period value
+    """
+    pattern, group_fields = scanner
+    field_count = len(set(group_fields.values()))
+    found = {}
+
+    for line in text.split('\n'):
         line_clean = line.strip()
-        line_lower = line_clean.lower()
-        
-        # Track sections to avoid mismatches
-        if 'assets' in line_lower and not 'total' in line_lower:
-            in_assets_section = True
-            in_liabilities_section = False
-        elif 'liabilities' in line_lower or 'fund capital' in line_lower:
-            in_assets_section = False
-            in_liabilities_section = True
-            
-        # Check patterns with context awareness
-        for pattern in patterns:
-            match = re.search(pattern, line_clean, re.IGNORECASE)
-            if match:
-                
-                # Context validation for derivative instruments
-                if field_name == 'DERIVATIVEINSTRUMENTS' and not in_assets_section:
-                    continue  # Skip if not in assets section
-                elif field_name == 'DERIVATIVEINSTRUMENTSLIABILITIES' and not in_liabilities_section:
-                    continue  # Skip if not in liabilities section
-                
-                # Pass the rest of the string from the match to extract_first_value
-                value = extract_first_value(line_clean[match.start():])
-                if value is not None:
-                    return value  # Return current period value
-    
-    return None
+        match = pattern.search(line_clean)
+        if not match:
+            continue
+
+        field_name = group_fields[match.lastgroup]
+        if field_name in found:
+            continue
+
+        # Pass the rest of the string from the match to extract_first_value
+        value = extract_first_value(line_clean[match.start():])
+        if value is not None:
+            found[field_name] = value  # Current period value
+            if len(found) == field_count:
+                break
+
+    return found
 
 
 def parse_balance_sheet_adaptive(pdf_path, year):
@@ -136,31 +287,10 @@ def parse_balance_sheet_adaptive(pdf_path, year):
     
     data = {}
     
-    # Comprehensive field patterns - handles all year variations
-    field_patterns = {
-        'EQUITIESANDPARTICIPATIONSLISTED': [r'Listed'],
-        'EQUITIESANDPARTICIPATIONSUNLISTED': [r'Unlisted', r'Non-listed'],
-        'BONDSANDOTHERFIXEDINCOMESECURITIES': [r'Bonds and other fixed-income securities'],
-        'DERIVATIVEINSTRUMENTS': [r'Derivative instruments'],
-        'CASHANDBANKBALANCES': [r'Cash and bank balances'],
-        'OTHERASSETS': [r'Other assets'],
-        'PREPAIDEXPENSESANDACCRUEDINCOME': [r'Prepaid expenses and accrued income'],
-        'TOTALASSETS': [r'TOTAL ASSETS'],
-        'DERIVATIVEINSTRUMENTSLIABILITIES': [r'Derivative instruments'],
-        'OTHERLIABILITIES': [r'Other liabilities'],
-        'DEFERREDINCOMEANDACCRUEDEXPENSES': [r'Deferred income and accrued expenses'],
-        'TOTALLIABILITIES': [r'Total liabilities'],
-        'FUNDCAPITALCARRIEDFORWARD': [r'Fund capital carried forward'],
-        'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM': [r'Net payments to the national pension system'],
-        'NETRESULTFORTHEPERIOD': [r'Net result for the period'],
-        'TOTALFUNDCAPITAL': [r'Total Fund capital'],
-        'TOTALFUNDCAPITALANDLIABILITIES': [r'TOTAL FUND CAPITAL AND LIABILITIES'],
-    }
-    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with fitz.open(pdf_path) as doc:
             # Find balance sheet page dynamically
-            page_num, page, text = find_balance_sheet_page(pdf)
+            page_num, page, text = find_balance_sheet_page(doc)
             
             if not page_num:
                 print("  ERROR: Could not find balance sheet page")
@@ -168,10 +298,19 @@ def parse_balance_sheet_adaptive(pdf_path, year):
             
             print(f"  Found balance sheet on page {page_num}")
             
-            # Extract each field with smart context awareness
+            # Split once so asset and liability lines with the same label
+            # (derivative instruments) are told apart by section
+            assets_text, liabilities_text = split_balance_sheet_sections(text)
+
+            if liabilities_text is not None:
+                extracted = smart_field_extraction(assets_text, ASSETS_SCANNER)
+                extracted.update(smart_field_extraction(liabilities_text, LIABILITIES_SCANNER))
+            else:
+                extracted = smart_field_extraction(assets_text, UNSPLIT_SCANNER)
+
             extracted_count = 0
-            for field_name, patterns in field_patterns.items():
-                value = smart_field_extraction(text, field_name, patterns)
+            for field_name in FIELD_PATTERN_SOURCES:
+                value = extracted.get(field_name)
                 if value is not None:
                     data[field_name] = value
                     print(f"    [OK] {field_name}: {value:,}")
@@ -204,14 +343,12 @@ def parse_balance_sheet_adaptive(pdf_path, year):
                 else:
                     print(f"    [WARN] WARNING: Fund({data['TOTALFUNDCAPITAL']:,}) + Liab({data['TOTALLIABILITIES']:,}) != Total({actual:,})")
             
-            print(f"    [INFO] SUMMARY: {extracted_count}/{len(field_patterns)} fields extracted")
+            print(f"    [INFO] SUMMARY: {extracted_count}/{len(FIELD_PATTERN_SOURCES)} fields extracted")
             if total_validations > 0:
                 print(f"    [INFO] VALIDATION: {validations_passed}/{total_validations} checks passed")
 
     except Exception as e:
-        print(f"  ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"  ERROR: {e}")
 
     return data
 
@@ -222,20 +359,20 @@ def create_output(all_data):
     print("CREATING OUTPUT")
     print(f"{'='*80}")
 
-    # Create a mapping from the internal field names to the output headers
-    field_to_header = {key.upper().replace(' ', '').replace('-', '').replace('(', '').replace(')', ''): header
-                       for key, header in config.HEADER_MAPPING.items()}
+    # Fill fixed-width rows by column position rather than building a dict per row
+    field_columns = [(internal_name, config.HEADER_INDEX[header])
+                     for internal_name, header in config.FIELD_TO_HEADER.items()]
 
-    df_data = []
+    rows = []
     for year, data in all_data.items():
-        row = {'Unnamed: 0': year}
-        # Use the mapping to populate the row
-        for internal_name, header in field_to_header.items():
-            row[header] = data.get(internal_name)
-        
-        df_data.append(row)
+        row = [None] * len(config.OUTPUT_HEADERS)
+        row[config.HEADER_INDEX['Unnamed: 0']] = year
+        for internal_name, column in field_columns:
+            row[column] = data.get(internal_name)
 
-    df = pd.DataFrame(df_data, columns=config.OUTPUT_HEADERS)
+        rows.append(row)
+
+    df = pd.DataFrame(rows, columns=config.OUTPUT_HEADERS)
 
     # Create output folders
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -249,8 +386,8 @@ def create_output(all_data):
     output_file = os.path.join(output_folder, f'AP2_Financial_Data_{timestamp}.xlsx')
     latest_file = os.path.join(latest_folder, 'AP2_Financial_Data_latest.xlsx')
 
-    df.to_excel(output_file, index=False)
-    df.to_excel(latest_file, index=False)
+    df.to_excel(output_file, index=False, engine='xlsxwriter')
+    link_latest(output_file, latest_file)
 
     print(f"OK Saved: {output_file}")
     print(f"OK Saved: {latest_file}")
@@ -272,55 +409,65 @@ def create_output(all_data):
     return output_file
 
 
-def extract_year_from_filename(filename):
-    """Extract year from various filename patterns"""
-    basename = os.path.basename(filename)
-    
-    # Try different patterns
-    patterns = [
-        r'(\\d{4})',  # Any 4 digits
-        r'AP2_(\\d{4})',  # AP2_YYYY
-        r'Half.*?(\\d{4})',  # Half-year-Report-YYYY
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, basename)
-        if match:
-            year = int(match.group(1))
-            if 2000 <= year <= 2030:  # Reasonable year range
-                return year
-    
-    # Default to current year if can't extract
-    return datetime.now().year
+def parse_balance_sheet_cached(pdf_path, year):
+    """Parse a PDF, reusing the result of an earlier run for identical file contents"""
+    data, from_cache = parse_with_cache(
+        pdf_path,
+        lambda: parse_balance_sheet_adaptive(pdf_path, year),
+        PARSE_CACHE_DIR,
+        PARSER_VERSION,
+        len(FIELD_PATTERN_SOURCES)
+    )
+    if from_cache:
+        print(f"\nUsing cached result for {os.path.basename(pdf_path)} (Year: {year})")
+
+    return data
+
+
+def parse_pdf_file(pdf_file):
+    """Parse a single PDF - runs in a worker process
+
+    Returns:
+        Tuple of (year, extracted data dict)
+    """
+    # Extract year from filename with improved logic
+    year = extract_year_from_filename(pdf_file)
+    print(f"Processing PDF for year: {year}")
+
+    # Extract data using adaptive parser
+    return year, parse_balance_sheet_cached(pdf_file, year)
 
 
 def main():
     """Main execution with enhanced error handling"""
+    print("=" * 80)
+    print("AP2 PDF Parser - Adaptive Version")
+    print("=" * 80)
+
     try:
         # Find latest download folder
         download_folder = find_latest_download_folder()
         if not download_folder:
+            print("ERROR: No download folders found")
             return
+        print(f"Processing folder: {download_folder}")
 
         # Find all PDFs in folder
-        pdf_files = glob.glob(os.path.join(download_folder, '*.pdf'))
+        pdf_files = list_pdf_files(download_folder)
         print(f"Found {len(pdf_files)} PDF files\\n")
 
         if not pdf_files:
             print("ERROR: No PDF files found")
             return
 
-        # Process each PDF
+        # Process PDFs in parallel - each one is independent, so use processes
         all_data = {}
+        max_workers = min(len(pdf_files), os.cpu_count() or 1, MAX_PARSE_WORKERS)
 
-        for pdf_file in pdf_files:
-            # Extract year from filename with improved logic
-            year = extract_year_from_filename(pdf_file)
-            print(f"Processing PDF for year: {year}")
-
-            # Extract data using adaptive parser
-            data = parse_balance_sheet_adaptive(pdf_file, year)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(parse_pdf_file, pdf_files))
 
+        for year, data in results:
             if data:
                 all_data[year] = data
                 print(f"  [OK] Extracted {len(data)} fields for {year}")
@@ -343,11 +490,10 @@ def main():
         print(f"{'='*80}")
 
     except Exception as e:
-        print(f"\\n[FATAL ERROR] {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n[FATAL ERROR] {e}")
         raise
 
 
 if __name__ == "__main__":
+    logging.basicConfig(format='%(message)s')
     main()
\ No newline at end of file
@@ -6,7 +6,7 @@ Contains all headers and settings in exact order as per sample data
 # ============================================================================
 # OUTPUT HEADERS - EXACT ORDER FROM SAMPLE DATA (DO NOT CHANGE ORDER!)
 # ============================================================================
-OUTPUT_HEADERS = [
+OUTPUT_HEADERS = (
     'Unnamed: 0',
     'AP2.FUNDCAPITALCARRIEDFORWARD.LEVEL.NONE.H.1@AP2',
     'AP2.NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM.FLOW.NONE.H.1@AP2',
@@ -28,10 +28,13 @@ OUTPUT_HEADERS = [
     'AP2.NETRESULTFORTHEPERIOD.FLOW.NONE.H.1@AP2',
     'AP2.TOTALFUNDCAPITAL.FLOW.NONE.H.1@AP2',
     'AP2.TOTALFUNDCAPITALANDLIABILITIES.FLOW.NONE.H.1@AP2'
-]
+)
+
+# Column position of each output header, for O(1) lookups when writing rows
+HEADER_INDEX = {header: i for i, header in enumerate(OUTPUT_HEADERS)}
 
 # Human-readable sub-headers (Row 2 in Excel) - EXACT match to sample
-OUTPUT_SUBHEADERS = [
+OUTPUT_SUBHEADERS = (
     None,  # First column has no sub-header
     'AP2 semi-annual: Fund capital carried forward',
     'AP2 semi-annual: Net outflows to the national pension system',
@@ -53,31 +56,39 @@ OUTPUT_SUBHEADERS = [
     'AP2 semi-annual: Balance - Net result for the period',
     'AP2 semi-annual: Balance - Total Fund capital',
     'AP2 semi-annual: Balance - Total Fund capital and other Liabilities'
-]
+)
+
+# Readable labels for OUTPUT_HEADERS[1:], in the same order
+HEADER_LABELS = (
+    'Fund Capital Carried Forward (Level)',
+    'Net Outflows to National Pension System',
+    'Total',
+    'Equities and Participations - Listed',
+    'Equities and Participations - Unlisted',
+    'Bonds and Other Fixed Income Securities',
+    'Derivative Instruments (Assets)',
+    'Cash and Bank Balances',
+    'Other Assets',
+    'Prepaid Expenses and Accrued Income',
+    'Total Assets',
+    'Derivative Instruments (Liabilities)',
+    'Other Liabilities',
+    'Deferred Income and Accrued Expenses',
+    'Total Liabilities',
+    'Fund Capital Carried Forward (Flow)',
+    'Net Payments to National Pension System',
+    'Net Result for the Period',
+    'Total Fund Capital',
+    'Total Fund Capital and Liabilities',
+)
 
 # Readable header mapping for reference
-HEADER_MAPPING = {
-    'Fund Capital Carried Forward (Level)': 'AP2.FUNDCAPITALCARRIEDFORWARD.LEVEL.NONE.H.1@AP2',
-    'Net Outflows to National Pension System': 'AP2.NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM.FLOW.NONE.H.1@AP2',
-    'Total': 'AP2.TOTAL.FLOW.NONE.H.1@AP2',
-    'Equities and Participations - Listed': 'AP2.EQUITIESANDPARTICIPATIONSLISTED.FLOW.NONE.H.1@AP2',
-    'Equities and Participations - Unlisted': 'AP2.EQUITIESANDPARTICIPATIONSUNLISTED.FLOW.NONE.H.1@AP2',
-    'Bonds and Other Fixed Income Securities': 'AP2.BONDSANDOTHERFIXEDINCOMESECURITIES.FLOW.NONE.H.1@AP2',
-    'Derivative Instruments (Assets)': 'AP2.DERIVATIVEINSTRUMENTS.FLOW.NONE.H.1@AP2',
-    'Cash and Bank Balances': 'AP2.CASHANDBANKBALANCES.FLOW.NONE.H.1@AP2',
-    'Other Assets': 'AP2.OTHERASSETS.FLOW.NONE.H.1@AP2',
-    'Prepaid Expenses and Accrued Income': 'AP2.PREPAIDEXPENSESANDACCRUEDINCOME.FLOW.NONE.H.1@AP2',
-    'Total Assets': 'AP2.TOTALASSETS.FLOW.NONE.H.1@AP2',
-    'Derivative Instruments (Liabilities)': 'AP2.DERIVATIVEINSTRUMENTSLIABILITIES.FLOW.NONE.H.1@AP2',
-    'Other Liabilities': 'AP2.OTHERLIABILITIES.FLOW.NONE.H.1@AP2',
-    'Deferred Income and Accrued Expenses': 'AP2.DEFERREDINCOMEANDACCRUEDEXPENSES.FLOW.NONE.H.1@AP2',
-    'Total Liabilities': 'AP2.TOTALLIABILITIES.FLOW.NONE.H.1@AP2',
-    'Fund Capital Carried Forward (Flow)': 'AP2.FUNDCAPITALCARRIEDFORWARD.FLOW.NONE.H.1@AP2',
-    'Net Payments to National Pension System': 'AP2.NETPAYMENTSTOTHENATIONALPENSIONSYSTEM.FLOW.NONE.H.1@AP2',
-    'Net Result for the Period': 'AP2.NETRESULTFORTHEPERIOD.FLOW.NONE.H.1@AP2',
-    'Total Fund Capital': 'AP2.TOTALFUNDCAPITAL.FLOW.NONE.H.1@AP2',
-    'Total Fund Capital and Liabilities': 'AP2.TOTALFUNDCAPITALANDLIABILITIES.FLOW.NONE.H.1@AP2'
-}
+HEADER_MAPPING = dict(zip(HEADER_LABELS, OUTPUT_HEADERS[1:]))
+
+# Same mapping keyed by field name - the label upper-cased with spaces,
+# hyphens and parentheses removed (e.g. 'Total Assets' -> 'TOTALASSETS')
+FIELD_TO_HEADER = {label.upper().translate(str.maketrans('', '', ' -()')): header
+                   for label, header in HEADER_MAPPING.items()}
 
 # ============================================================================
 # SCRAPING CONFIGURATION
@@ -113,12 +124,16 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 LOGS_FOLDER = "logs"
 DOWNLOADS_FOLDER = "downloads"
 OUTPUT_FOLDER = "output"
+CACHE_FOLDER = ".cache"
+CHROME_PROFILE_FOLDER = ".chrome-profile"
 LATEST_FOLDER_NAME = "latest"
 
 # Full paths (auto-generated)
 LOGS_DIR = os.path.join(PROJECT_ROOT, LOGS_FOLDER)
 DOWNLOADS_DIR = os.path.join(PROJECT_ROOT, DOWNLOADS_FOLDER)
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, OUTPUT_FOLDER)
+CACHE_DIR = os.path.join(PROJECT_ROOT, CACHE_FOLDER)
+CHROME_PROFILE_DIR = os.path.join(PROJECT_ROOT, CHROME_PROFILE_FOLDER)
 
 # ============================================================================
 # PDF PARSING CONFIGURATION
@@ -137,11 +152,11 @@ TABLE_KEYWORDS = [
 
 # PDF parsing settings
 PDF_PARSING = {
-    'use_tabula': True,      # Use tabula-py for table extraction
-    'use_camelot': True,     # Use camelot for table extraction (fallback)
     'multiple_tables': True,  # Extract multiple tables from each PDF
     'lattice_mode': True,    # Use lattice mode for tables with borders
     'stream_mode': True,     # Use stream mode for tables without borders
+    'use_cache': True,       # Reuse complete results for unchanged PDFs (delete .cache/ to reset)
+    'max_workers': None,     # Parallel parser processes (None = one per CPU core)
 }
 
 # ============================================================================
@@ -149,10 +164,27 @@ PDF_PARSING = {
 # ============================================================================
 
 SELENIUM_CONFIG = {
-    'implicit_wait': 10,        # Implicit wait time in seconds
+    'implicit_wait': 0,         # Keep at 0 - mixing with explicit WebDriverWait compounds timeouts
     'page_load_timeout': 30,    # Page load timeout
     'download_timeout': 120,    # Download completion timeout
     'use_undetected_chrome': True,  # Use undetected_chromedriver
+    'headless': True,           # Run Chrome without a window - only page HTML and PDFs are needed
+    'block_images': True,       # Skip image downloads on the reports page
+}
+
+# ============================================================================
+# DOWNLOAD CONFIGURATION
+# ============================================================================
+
+DOWNLOAD_CONFIG = {
+    'max_workers': 4,          # Number of PDFs downloaded in parallel
+    'request_timeout': 60,     # Per-request HTTP timeout in seconds
+    'chunk_size': 64 * 1024,   # Bytes written per chunk when streaming a PDF to disk
+    'max_retries': 3,          # Retries for connection errors and 429/5xx responses
+    'retry_backoff': 0.3,      # Exponential backoff factor between retries (seconds)
+    'index_cache_ttl_hours': 24,  # Reuse the scraped reports index for this long (ignored for 'latest')
+    'static_index': True,      # Fetch the reports page over plain HTTP first, browser only as fallback
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
 }
 
 # ============================================================================
@@ -174,6 +206,10 @@ OUTPUT_CONFIG = {
     'output_format': 'xlsx',  # Options: 'xlsx', 'csv', 'both'
     'include_metadata': True,  # Include metadata sheet with run information
     'preserve_formatting': True,  # Preserve number formatting
+    'write_xlsx': True,  # Excel workbook with technical + human-readable header rows
+    'write_parquet': True,  # Columnar copy for analytics (requires pyarrow)
+    'parquet_compression': 'zstd',
+    'xlsxwriter_min_rows': 5000,  # Above this many rows, write xlsx with xlsxwriter in constant-memory mode
 }
 
 # ============================================================================
@@ -218,6 +254,8 @@ def validate_config():
     # Validate headers
     if len(OUTPUT_HEADERS) != 21:
         errors.append(f"Expected 21 headers, got {len(OUTPUT_HEADERS)}")
+    if len(HEADER_LABELS) != len(OUTPUT_HEADERS) - 1:
+        errors.append(f"Expected {len(OUTPUT_HEADERS) - 1} header labels, got {len(HEADER_LABELS)}")
 
     # Validate year settings - be flexible with string/int
     if TARGET_YEAR is not None:
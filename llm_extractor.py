@@ -4,49 +4,128 @@ Uses OpenRouter API with free models for robust extraction when Camelot/Regex fa
 Zero cost using deepseek/deepseek-chat-v3.1 or other free models
 """
 import os
+import re
 import json
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
 import requests
-from typing import Dict, Optional, List
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional, List, Tuple
 
-# Load environment variables
-load_dotenv()
+try:
+    import orjson  # Optional - faster parsing of API responses
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+import config
 
 logger = logging.getLogger(__name__)
 
+# Bump when prompts or reply post-processing change, so cached responses are not reused
+PROMPT_VERSION = "v1"
+
+# Markdown code fences around a JSON reply (```json ... ```)
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```\s*$', re.MULTILINE)
+
+# Seconds to establish a connection (fail fast) and to wait between streamed chunks
+LLM_CONNECT_TIMEOUT = 3
+LLM_READ_TIMEOUT = 30
+
+# Cap on concurrent OpenRouter requests, to stay inside the free tier's rate limits.
+# Per process - pdf_parser_enhanced makes all its LLM calls from its main process
+MAX_CONCURRENT_REQUESTS = 6
+_request_slots = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Deterministic pass over the page text, tried before paying for an LLM call.
+# Labels must open a line and be followed by a single value ending its line (the
+# PyMuPDF layout puts each period's value on its own line); anything else is left
+# to the LLM rather than risk reading a comparison-period column.
+_BALANCE_SHEET_VALUE = r'[ \t]*\n?[ \t]*(-?\d{1,3}(?:[ \xa0]\d{3})*)[ \t]*$'
+_ASSET_LABELS = {
+    'EQUITIESANDPARTICIPATIONSLISTED': r'listed',
+    'EQUITIESANDPARTICIPATIONSUNLISTED': r'(?:unlisted|non-listed)',
+    'BONDSANDOTHERFIXEDINCOMESECURITIES': r'bonds and other fixed-income securities',
+    'DERIVATIVEINSTRUMENTS': r'derivative instruments',
+    'CASHANDBANKBALANCES': r'cash and bank balances',
+    'OTHERASSETS': r'other assets',
+    'PREPAIDEXPENSESANDACCRUEDINCOME': r'(?:prepaid|deferred) expenses and accrued income',
+    'TOTALASSETS': r'total assets',
+}
+_LIABILITY_LABELS = {
+    'DERIVATIVEINSTRUMENTSLIABILITIES': r'derivative instruments',
+    'OTHERLIABILITIES': r'other liabilities',
+    'DEFERREDINCOMEANDACCRUEDEXPENSES': r'deferred income and accrued expenses',
+    'TOTALLIABILITIES': r'total liabilities',
+    'FUNDCAPITALCARRIEDFORWARD': r'fund capital (?:carried|brought) forward',
+    'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM': r'net payments (?:to|from) the national pension system',
+    'NETRESULTFORTHEPERIOD': r'net result for the (?:period|year)',
+    'TOTALFUNDCAPITAL': r'total fund capital',
+    'TOTALFUNDCAPITALANDLIABILITIES': r'total fund capital and liabilities',
+}
+_ASSET_PATTERNS = {field: re.compile(rf'^[ \t]*{label}{_BALANCE_SHEET_VALUE}', re.IGNORECASE | re.MULTILINE)
+                   for field, label in _ASSET_LABELS.items()}
+_LIABILITY_PATTERNS = {field: re.compile(rf'^[ \t]*{label}{_BALANCE_SHEET_VALUE}', re.IGNORECASE | re.MULTILINE)
+                       for field, label in _LIABILITY_LABELS.items()}
+# Liability-side fields are only read after this heading, so that "Derivative
+# instruments" and the income statement's net result resolve to the right line
+_LIABILITIES_HEADING = re.compile(r'^[ \t]*(?:fund capital and liabilities|liabilities)[ \t]*$',
+                                  re.IGNORECASE | re.MULTILINE)
+
+# Subtotal -> line items that make it up
+_BALANCE_SHEET_SUBTOTALS = {
+    'TOTALASSETS': [field for field in _ASSET_LABELS if field != 'TOTALASSETS'],
+    'TOTALLIABILITIES': ['DERIVATIVEINSTRUMENTSLIABILITIES', 'OTHERLIABILITIES', 'DEFERREDINCOMEANDACCRUEDEXPENSES'],
+    'TOTALFUNDCAPITAL': ['FUNDCAPITALCARRIEDFORWARD', 'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM', 'NETRESULTFORTHEPERIOD'],
+}
+
+
+def extract_balance_sheet_regex(text: str) -> Optional[Dict[str, int]]:
+    """
+    Read all 17 Balance Sheet fields without the LLM, for clean page layouts
 
-class LLMExtractor:
-    """Extract fields using LLM when traditional methods fail"""
+    Returns:
+        Dict with every field (in SEK million), or None unless all fields were
+        found, the balance sheet totals add up and the line items add up to
+        their subtotals
+    """
+    heading = _LIABILITIES_HEADING.search(text)
+    if not heading:
+        return None
 
-    def __init__(self):
-        """Initialize LLM extractor with OpenRouter API"""
-        self.api_key = os.getenv('OPENROUTER_API_KEY')
-        self.model = os.getenv('LLM_MODEL', 'deepseek/deepseek-chat-v3.1')
-        self.enabled = os.getenv('ENABLE_LLM_FALLBACK', 'true').lower() == 'true'
+    assets_text, liabilities_text = text[:heading.start()], text[heading.start():]
 
-        if not self.api_key:
-            logger.warning("  [WARNING] OPENROUTER_API_KEY not found in .env file")
-            logger.warning("  [WARNING] LLM fallback will be disabled")
-            self.enabled = False
+    result = {}
+    for patterns, section in ((_ASSET_PATTERNS, assets_text), (_LIABILITY_PATTERNS, liabilities_text)):
+        for field, pattern in patterns.items():
+            match = pattern.search(section)
+            if not match:
+                return None
+            result[field] = int(match.group(1).replace(' ', '').replace('\xa0', ''))
 
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+    # Only trust the fast path when both balance sheet identities hold
+    total = result['TOTALFUNDCAPITALANDLIABILITIES']
+    if abs(result['TOTALASSETS'] - total) > 1:
+        return None
+    if abs(result['TOTALFUNDCAPITAL'] + result['TOTALLIABILITIES'] - total) > 1:
+        return None
 
-    def extract_balance_sheet(self, text: str) -> Dict[str, float]:
-        """
-        Extract all 17 Balance Sheet fields using LLM
+    # ...and every line item adds up to its subtotal, so a label that picked up
+    # the wrong number (a note reference, a comparison period) is caught
+    for total_field, item_fields in _BALANCE_SHEET_SUBTOTALS.items():
+        items_sum = sum(result[field] for field in item_fields)
+        if abs(items_sum - result[total_field]) > len(item_fields):  # Each item is rounded
+            return None
 
-        Args:
-            text: Raw text from Balance Sheet page
+    return result
 
-        Returns:
-            Dict with extracted fields (in SEK million, NOT billions)
-        """
-        if not self.enabled:
-            logger.debug("  LLM extraction disabled (no API key or disabled in .env)")
-            return {}
 
-        prompt = f"""Extract the following 17 Balance Sheet fields from this Swedish pension fund report text. Return ONLY a JSON object with these exact field names and their numeric values (in SEK million):
+_BALANCE_SHEET_INSTRUCTIONS = """Extract the following 17 Balance Sheet fields from this Swedish pension fund report text. Return ONLY a JSON object with these exact field names and their numeric values (in SEK million):
 
 Required fields:
 - EQUITIESANDPARTICIPATIONSLISTED (Listed shares)
@@ -71,24 +150,244 @@ IMPORTANT NOTES:
 1. "Derivative instruments" appears TWICE - once in Assets section and once in Liabilities section. Use the correct one for each field.
 2. Keep values in SEK MILLION (do NOT convert to billions)
 3. Preserve negative signs (e.g., net payments may be negative)
-4. Return ONLY valid JSON, no markdown, no explanations
+4. Return ONLY valid JSON, no markdown, no explanations"""
+
+_KEY_RATIOS_INSTRUCTIONS = """You are extracting financial data from a Swedish pension fund report. The report may contain tables with multiple columns showing different time periods.
+
+STEP 1: Identify the table structure
+- Look for column headers indicating time periods (e.g., "Jan.-June 2020", "Jan.-June 2019", "Jan.-Dec. 2019")
+- The FIRST column (leftmost) after the row labels contains the CURRENT PERIOD data
+- Other columns are comparison data from PREVIOUS periods - IGNORE THESE
+
+STEP 2: Extract these 3 fields (return as JSON):
+- FUNDCAPITALCARRIEDFORWARDLEVEL: Look for "Fund capital carried forward" (preferred) or "Fund capital brought forward". Extract the FIRST numeric value that appears after this label.
+- NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM: Look for "Net outflows to the national pension system". Extract the FIRST numeric value (may be negative).
+- TOTAL: Look for "Net result for the period" or "Net result for the year". Extract the FIRST numeric value (may be negative).
+
+STEP 3: Format rules
+- All values must be in SEK BILLION
+- Preserve negative signs (e.g., -4.2 not 4.2)
+- Return ONLY a valid JSON object like: {"FUNDCAPITALCARRIEDFORWARDLEVEL": 357.9, "NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM": -4.2, "TOTAL": -19.3}
+
+CRITICAL: When you see multiple numbers after a field name, take the FIRST one (current period), not subsequent ones (comparison periods).
+
+Example from text:
+"Fund capital carried forward, SEK billion
+357.9    367.4    381.3"
+→ Extract: 357.9 (first value = current period)
+NOT 381.3 (third value = old comparison period)"""
 
-TEXT TO EXTRACT FROM:
-{text}"""
+_COMBINED_INSTRUCTIONS = """This request covers two pages of the same Swedish pension fund report. Follow the instructions for each part and return ONLY a JSON object of the form {"balance_sheet": {...}, "key_ratios": {...}}, with each part's fields under its key. No markdown, no explanations.
 
+PART 1 - "balance_sheet", from the BALANCE SHEET TEXT below:
+""" + _BALANCE_SHEET_INSTRUCTIONS + """
+
+PART 2 - "key_ratios", from the KEY RATIOS TEXT below:
+""" + _KEY_RATIOS_INSTRUCTIONS
+
+
+# Page text sent to the LLM is cut down to the section the prompt is about
+SECTION_CONTEXT_BEFORE = 200
+SECTION_CONTEXT_AFTER = 3000
+_KEY_RATIOS_KEYWORDS = ['key ratios', 'key figures', 'fund capital carried forward']
+
+
+def _section_window(text: str, keywords: List[str]) -> str:
+    """Trim page text to a window starting just before the first section keyword
+
+    Fewer input tokens means a faster response. Text with no keyword is
+    trimmed from the start.
+    """
+    if len(text) <= SECTION_CONTEXT_BEFORE + SECTION_CONTEXT_AFTER:
+        return text
+
+    text_lower = text.lower()
+    positions = [pos for pos in (text_lower.find(keyword) for keyword in keywords) if pos >= 0]
+    start = max(min(positions, default=0) - SECTION_CONTEXT_BEFORE, 0)
+    return text[start:start + SECTION_CONTEXT_BEFORE + SECTION_CONTEXT_AFTER]
+
+
+def _response_format(name: str, fields) -> dict:
+    """Strict JSON Schema response_format for a flat object of numeric fields"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {field: {"type": ["number", "null"]} for field in fields},
+                "required": list(fields),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+BALANCE_SHEET_FIELDS = (*_ASSET_LABELS, *_LIABILITY_LABELS)
+KEY_RATIOS_FIELDS = ('FUNDCAPITALCARRIEDFORWARDLEVEL', 'NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM', 'TOTAL')
+
+_BALANCE_SHEET_FORMAT = _response_format("BalanceSheet", BALANCE_SHEET_FIELDS)
+_KEY_RATIOS_FORMAT = _response_format("KeyRatios", KEY_RATIOS_FIELDS)
+_COMBINED_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "BalanceSheetAndKeyRatios",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "balance_sheet": _BALANCE_SHEET_FORMAT["json_schema"]["schema"],
+                "key_ratios": _KEY_RATIOS_FORMAT["json_schema"]["schema"],
+            },
+            "required": ["balance_sheet", "key_ratios"],
+            "additionalProperties": False,
+        },
+    },
+}
+# Batch replies are keyed by year, which a fixed schema cannot list
+_JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+
+def _reply_error(content: str, response_format: dict) -> Optional[str]:
+    """Why a reply does not match the requested format, or None if it does"""
+    try:
+        data = _json_loads(content)
+    except ValueError as e:
+        return f"invalid JSON ({e})"
+    if not isinstance(data, dict):
+        return "reply is not a JSON object"
+
+    schema = response_format.get("json_schema", {}).get("schema", {})
+    missing = [field for field in schema.get("required", ()) if field not in data]
+    if missing:
+        return f"missing fields {', '.join(missing)}"
+    return None
+
+
+def _reply_json_text(content: str) -> str:
+    """Strip markdown fences and any text around the JSON object in an LLM reply"""
+    # Remove markdown code blocks if present
+    content = _FENCE_RE.sub('', content).strip()
+
+    # Extract JSON from response (in case model adds extra text)
+    # Look for first { and last }
+    start_idx = content.find('{')
+    end_idx = content.rfind('}')
+    if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
+        content = content[start_idx:end_idx+1]
+
+    return content
+
+
+def _extraction_prompt(instructions: str, text: str) -> str:
+    """Single-section prompt: instructions followed by the page text"""
+    return f"{instructions}\n\nTEXT TO EXTRACT FROM:\n{text}"
+
+
+def _balance_sheet_values(data: dict) -> Dict[str, float]:
+    """Convert LLM Balance Sheet values to integers (values are in millions)
+
+    Rows absent from the page come back as null under the strict schema and
+    are left out, so callers only ever see numbers.
+    """
+    result = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        try:
+            # Handle both float and int values, preserve sign
+            result[key] = int(float(value))
+        except (ValueError, TypeError):
+            logger.warning(f"  [WARNING] Could not convert {key}={value} to number")
+            continue
+    return result
+
+
+def _key_ratios_values(data: dict) -> Dict[str, float]:
+    """Convert LLM Key Ratios values to floats (values are in billions), leaving out nulls"""
+    result = {}
+    for key, value in data.items():
+        if value is None:
+            continue
         try:
-            response = self._call_llm(prompt)
-            data = json.loads(response)
-
-            # Convert to integers (values are in millions)
-            result = {}
-            for key, value in data.items():
-                try:
-                    # Handle both float and int values, preserve sign
-                    result[key] = int(float(value)) if value is not None else None
-                except (ValueError, TypeError):
-                    logger.warning(f"  [WARNING] Could not convert {key}={value} to number")
-                    continue
+            result[key] = float(value)
+        except (ValueError, TypeError):
+            logger.warning(f"  [WARNING] Could not convert {key}={value} to number")
+            continue
+    return result
+
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load .env once, on first use rather than at import"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class LLMExtractor:
+    """Extract fields using LLM when traditional methods fail"""
+
+    def __init__(self):
+        """Initialize LLM extractor with OpenRouter API"""
+        _load_env()
+
+        self.api_key = os.getenv('OPENROUTER_API_KEY')
+        self.model = os.getenv('LLM_MODEL', 'deepseek/deepseek-chat-v3.1')
+        self.enabled = os.getenv('ENABLE_LLM_FALLBACK', 'true').lower() == 'true'
+        # Reuse responses for identical requests for this long (0 disables the cache)
+        self.cache_hours = float(os.getenv('LLM_CACHE_HOURS', '168'))
+        self.max_tokens = int(os.getenv('LLM_MAX_TOKENS', '800'))
+
+        if not self.api_key:
+            logger.warning("  [WARNING] OPENROUTER_API_KEY not found in .env file")
+            logger.warning("  [WARNING] LLM fallback will be disabled")
+            self.enabled = False
+
+        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+
+        # Keep-alive connections so repeated calls skip the TCP/TLS handshake.
+        # Stalled connections, rate limiting and gateway errors are retried with
+        # exponential backoff (1s, 2s, 4s) rather than failing the extraction.
+        retries = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('POST',),
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://github.com/yourusername/ap2-scraper",
+            "X-Title": "AP2 PDF Parser"
+        })
+
+    def extract_balance_sheet(self, text: str) -> Dict[str, float]:
+        """
+        Extract all 17 Balance Sheet fields using LLM
+
+        Args:
+            text: Raw text from Balance Sheet page
+
+        Returns:
+            Dict with extracted fields (in SEK million, NOT billions)
+        """
+        result = extract_balance_sheet_regex(text)
+        if result is not None:
+            logger.info("  [REGEX] Extracted 17/17 Balance Sheet fields, skipping LLM call")
+            return result
+
+        if not self.enabled:
+            logger.debug("  LLM extraction disabled (no API key or disabled in .env)")
+            return {}
+
+        prompt = _extraction_prompt(_BALANCE_SHEET_INSTRUCTIONS, _section_window(text, config.TABLE_KEYWORDS))
+
+        try:
+            response = self._call_llm(prompt, response_format=_BALANCE_SHEET_FORMAT)
+            result = _balance_sheet_values(_json_loads(response))
 
             logger.info(f"  [LLM] Extracted {len(result)}/17 Balance Sheet fields")
             return result
@@ -111,108 +410,269 @@ TEXT TO EXTRACT FROM:
             logger.debug("  LLM extraction disabled (no API key or disabled in .env)")
             return {}
 
-        prompt = f"""You are extracting financial data from a Swedish pension fund report. The report may contain tables with multiple columns showing different time periods.
+        prompt = _extraction_prompt(_KEY_RATIOS_INSTRUCTIONS, _section_window(text, _KEY_RATIOS_KEYWORDS))
 
-STEP 1: Identify the table structure
-- Look for column headers indicating time periods (e.g., "Jan.-June 2020", "Jan.-June 2019", "Jan.-Dec. 2019")
-- The FIRST column (leftmost) after the row labels contains the CURRENT PERIOD data
-- Other columns are comparison data from PREVIOUS periods - IGNORE THESE
+        try:
+            response = self._call_llm(prompt, response_format=_KEY_RATIOS_FORMAT)
+            result = _key_ratios_values(_json_loads(response))
 
-STEP 2: Extract these 3 fields (return as JSON):
-- FUNDCAPITALCARRIEDFORWARDLEVEL: Look for "Fund capital carried forward" (preferred) or "Fund capital brought forward". Extract the FIRST numeric value that appears after this label.
-- NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM: Look for "Net outflows to the national pension system". Extract the FIRST numeric value (may be negative).
-- TOTAL: Look for "Net result for the period" or "Net result for the year". Extract the FIRST numeric value (may be negative).
+            logger.info(f"  [LLM] Extracted {len(result)}/3 Key Ratios fields")
+            return result
 
-STEP 3: Format rules
-- All values must be in SEK BILLION
-- Preserve negative signs (e.g., -4.2 not 4.2)
-- Return ONLY a valid JSON object like: {{"FUNDCAPITALCARRIEDFORWARDLEVEL": 357.9, "NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM": -4.2, "TOTAL": -19.3}}
+        except Exception as e:
+            logger.error(f"  [LLM ERROR] Key Ratios extraction failed: {e}")
+            return {}
 
-CRITICAL: When you see multiple numbers after a field name, take the FIRST one (current period), not subsequent ones (comparison periods).
+    def extract_all(self, balance_sheet_text: str, key_ratios_text: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Extract Balance Sheet and Key Ratios fields in a single LLM call
 
-Example from text:
-"Fund capital carried forward, SEK billion
-357.9    367.4    381.3"
-→ Extract: 357.9 (first value = current period)
-NOT 381.3 (third value = old comparison period)
+        Saves a round trip and the repeated prompt overhead compared to calling
+        extract_balance_sheet and extract_key_ratios separately.
+
+        Args:
+            balance_sheet_text: Raw text from Balance Sheet page
+            key_ratios_text: Raw text from Key Ratios page
+
+        Returns:
+            Tuple of (Balance Sheet fields in SEK million, Key Ratios fields in SEK billion)
+        """
+        # A balance sheet the regex can read leaves only the key ratios for the LLM
+        if extract_balance_sheet_regex(balance_sheet_text) is not None:
+            return self.extract_balance_sheet(balance_sheet_text), self.extract_key_ratios(key_ratios_text)
+
+        if not self.enabled:
+            logger.debug("  LLM extraction disabled (no API key or disabled in .env)")
+            return {}, {}
 
-TEXT TO EXTRACT FROM:
-{text}"""
+        prompt = (f"{_COMBINED_INSTRUCTIONS}\n\n"
+                  f"=== BALANCE SHEET TEXT ===\n{_section_window(balance_sheet_text, config.TABLE_KEYWORDS)}\n\n"
+                  f"=== KEY RATIOS TEXT ===\n{_section_window(key_ratios_text, _KEY_RATIOS_KEYWORDS)}")
 
         try:
-            response = self._call_llm(prompt)
-            data = json.loads(response)
-
-            # Convert to float (values are in billions)
-            result = {}
-            for key, value in data.items():
-                try:
-                    result[key] = float(value) if value is not None else None
-                except (ValueError, TypeError):
-                    logger.warning(f"  [WARNING] Could not convert {key}={value} to number")
-                    continue
+            response = self._call_llm(prompt, response_format=_COMBINED_FORMAT)
+            data = _json_loads(response)
+            balance_sheet = _balance_sheet_values(data.get('balance_sheet') or {})
+            key_ratios = _key_ratios_values(data.get('key_ratios') or {})
 
-            logger.info(f"  [LLM] Extracted {len(result)}/3 Key Ratios fields")
-            return result
+            logger.info(f"  [LLM] Extracted {len(balance_sheet)}/17 Balance Sheet and "
+                        f"{len(key_ratios)}/3 Key Ratios fields")
+            return balance_sheet, key_ratios
 
         except Exception as e:
-            logger.error(f"  [LLM ERROR] Key Ratios extraction failed: {e}")
-            return {}
+            logger.error(f"  [LLM ERROR] Combined extraction failed: {e}")
+            return {}, {}
 
-    def _call_llm(self, prompt: str) -> str:
+    def _call_llm(self, prompt: str, response_format: dict = _JSON_OBJECT_FORMAT) -> str:
         """
         Call OpenRouter API with the given prompt
 
+        The reply is constrained to response_format. A reply that still fails to
+        match it is retried once, with the problem sent back to the model.
+
         Args:
             prompt: User prompt for extraction
+            response_format: OpenRouter response_format (JSON Schema or JSON mode)
 
         Returns:
             Raw text response from LLM
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/yourusername/ap2-scraper",
-            "X-Title": "AP2 PDF Parser"
-        }
+        messages = [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+        cache_file = self._cache_path(self._payload(messages, response_format))
+        cached = self._load_cached_response(cache_file)
+        if cached is not None:
+            logger.debug(f"  [LLM] Using cached {self.model} response")
+            return cached
+
+        logger.debug(f"  [LLM] Calling {self.model} via OpenRouter...")
+        content = self._post(self._payload(messages, response_format))
+
+        error = _reply_error(content, response_format)
+        if error:
+            logger.warning(f"  [LLM] Reply did not match the requested format ({error}), retrying once")
+            messages += [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": f"Your reply failed validation: {error}. "
+                                            f"Return ONLY the corrected JSON object."},
+            ]
+            content = self._post(self._payload(messages, response_format))
+            error = _reply_error(content, response_format)
+            if error:
+                raise ValueError(f"LLM reply did not match the requested format: {error}")
+
+        self._save_cached_response(cache_file, content)
+        return content
 
-        payload = {
+    def _payload(self, messages: List[dict], response_format: dict) -> dict:
+        """Request body for an extraction call"""
+        return {
             "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.0  # Deterministic for data extraction
+            "messages": messages,
+            "temperature": 0.0,  # Deterministic for data extraction
+            "max_tokens": self.max_tokens,  # The reply is a small JSON object - bound decode time
+            "response_format": response_format,  # Structured output instead of free text
+            "stream": True  # Read tokens as they are generated instead of waiting for the whole body
         }
 
-        logger.debug(f"  [LLM] Calling {self.model} via OpenRouter...")
-
-        response = requests.post(
+    def _post(self, payload: dict) -> str:
+        """Send one request and return the reply text"""
+        with _request_slots, self.session.post(
             self.api_url,
-            headers=headers,
             json=payload,
-            timeout=30
-        )
+            timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            content = self._read_stream(response)
+
+        # Models that ignore response_format can still wrap the JSON in prose or fences
+        return _reply_json_text(content)
 
-        response.raise_for_status()
+    @staticmethod
+    def _read_stream(response) -> str:
+        """Assemble the reply text from a server-sent events response
 
-        result = response.json()
-        content = result['choices'][0]['message']['content']
+        The stream is read through to [DONE]: a response left part-read can't
+        go back to the session's pool, and the next call would reconnect.
+        """
+        parts = []
+        for line in response.iter_lines():
+            # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank separators
+            if not line.startswith(b'data: '):
+                continue
+
+            data = line[len(b'data: '):]
+            if data == b'[DONE]':
+                break
+
+            chunk = _json_loads(data)
+            if 'error' in chunk:
+                raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+
+            choice = chunk['choices'][0]
+            delta = choice.get('delta', {}).get('content')
+            if delta:
+                parts.append(delta)
+
+            # A reply cut off at max_tokens is incomplete JSON - fail rather than cache it
+            if choice.get('finish_reason') == 'length':
+                raise RuntimeError("LLM reply truncated at max_tokens (raise LLM_MAX_TOKENS)")
+
+        return ''.join(parts)
+
+    def _cache_path(self, payload: dict) -> str:
+        """Cache file for a request - keyed by the full payload (model, prompt, settings) and PROMPT_VERSION"""
+        key = f"{PROMPT_VERSION}|{json.dumps(payload, sort_keys=True)}"
+        payload_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(config.CACHE_DIR, 'llm', f"{payload_hash}.json")
+
+    def _load_cached_response(self, cache_file: str) -> Optional[str]:
+        """Load a cached response, or None if caching is off or it is missing or expired"""
+        if self.cache_hours <= 0:
+            return None
 
-        # Remove markdown code blocks if present
-        content = content.replace('```json', '').replace('```', '').strip()
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            fetched_at = datetime.fromisoformat(cached['fetched_at'])
+            content = cached['content']
+        except (OSError, ValueError, KeyError):
+            return None
 
-        # Extract JSON from response (in case model adds extra text)
-        # Look for first { and last }
-        start_idx = content.find('{')
-        end_idx = content.rfind('}')
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            content = content[start_idx:end_idx+1]
+        if datetime.now() - fetched_at > timedelta(hours=self.cache_hours):
+            return None
 
         return content
 
+    def _save_cached_response(self, cache_file: str, content: str):
+        """Save a response for later identical requests"""
+        if self.cache_hours <= 0:
+            return
+
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+        # Write to a private temp file and rename it into place, so concurrent
+        # extractions never read a half-written entry
+        tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fetched_at': datetime.now().isoformat(),
+                'model': self.model,
+                'prompt_version': PROMPT_VERSION,
+                'content': content,
+            }, f, indent=2)
+        os.replace(tmp_file, cache_file)
+
+
+@lru_cache(maxsize=128)
+def _pages_text(pdf_path: str, mtime: float, page_nums: tuple) -> tuple:
+    """Text of several PDF pages from a single open - mtime is part of the key so edited files are re-read"""
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        return tuple(doc[page_num - 1].get_text() for page_num in page_nums)  # 0-indexed
+
+
+def get_pages_text(pdf_path: str, page_nums: List[int]) -> List[str]:
+    """Text of PDF pages (1-indexed), cached for repeated fallbacks on the same pages"""
+    return list(_pages_text(pdf_path, os.path.getmtime(pdf_path), tuple(page_nums)))
+
+
+def get_page_text(pdf_path: str, page_num: int) -> str:
+    """Text of a PDF page (1-indexed)"""
+    return get_pages_text(pdf_path, [page_num])[0]
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor() -> LLMExtractor:
+    """Shared extractor, so the fallbacks reuse one pooled HTTP session"""
+    global _extractor
+    with _extractor_lock:  # extract_many calls this from several threads
+        if _extractor is None:
+            _extractor = LLMExtractor()
+    return _extractor
+
+
+def extract_sections_llm(pdf_path: str, sections: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+    """
+    Extract several sections of one PDF, opening the document once
+
+    When both sections are requested they go to the LLM in a single call.
+
+    Args:
+        pdf_path: Path to PDF file
+        sections: 'balance_sheet' and/or 'key_ratios' -> page number (1-indexed)
+
+    Returns:
+        Dict of section name -> extracted fields
+    """
+    names = list(sections)
+    texts = dict(zip(names, get_pages_text(pdf_path, [sections[name] for name in names])))
+    extractor = get_extractor()
+
+    if 'balance_sheet' in texts and 'key_ratios' in texts:
+        logger.info("  [LLM FALLBACK] Attempting combined Balance Sheet + Key Ratios extraction...")
+        balance_sheet, key_ratios = extractor.extract_all(texts['balance_sheet'], texts['key_ratios'])
+        return {'balance_sheet': balance_sheet, 'key_ratios': key_ratios}
+
+    results = {}
+    if 'balance_sheet' in texts:
+        logger.info("  [LLM FALLBACK] Attempting LLM-based Balance Sheet extraction...")
+        results['balance_sheet'] = extractor.extract_balance_sheet(texts['balance_sheet'])
+    if 'key_ratios' in texts:
+        logger.info("  [LLM FALLBACK] Attempting LLM-based Key Ratios extraction...")
+        results['key_ratios'] = extractor.extract_key_ratios(texts['key_ratios'])
+    return results
+
 
 def extract_balance_sheet_llm(pdf_path: str, page_num: int) -> Dict[str, float]:
     """
@@ -225,19 +685,7 @@ def extract_balance_sheet_llm(pdf_path: str, page_num: int) -> Dict[str, float]:
     Returns:
         Dict with extracted Balance Sheet fields
     """
-    import fitz
-
-    logger.info("  [LLM FALLBACK] Attempting LLM-based Balance Sheet extraction...")
-
-    # Extract text from page
-    doc = fitz.open(pdf_path)
-    page = doc[page_num - 1]  # 0-indexed
-    text = page.get_text()
-    doc.close()
-
-    # Use LLM to extract
-    extractor = LLMExtractor()
-    return extractor.extract_balance_sheet(text)
+    return extract_sections_llm(pdf_path, {'balance_sheet': page_num})['balance_sheet']
 
 
 def extract_key_ratios_llm(pdf_path: str, page_num: int) -> Dict[str, float]:
@@ -251,19 +699,60 @@ def extract_key_ratios_llm(pdf_path: str, page_num: int) -> Dict[str, float]:
     Returns:
         Dict with extracted Key Ratios fields
     """
-    import fitz
+    return extract_sections_llm(pdf_path, {'key_ratios': page_num})['key_ratios']
+
+
+def extract_all_llm(pdf_path: str, balance_sheet_page: int, key_ratios_page: int) -> Dict[str, float]:
+    """
+    Extract Balance Sheet and Key Ratios together in a single LLM call
+
+    Args:
+        pdf_path: Path to PDF file
+        balance_sheet_page: Page number containing Balance Sheet (1-indexed)
+        key_ratios_page: Page number containing Key Ratios (1-indexed)
+
+    Returns:
+        Dict with extracted Balance Sheet and Key Ratios fields
+    """
+    sections = extract_sections_llm(pdf_path, {'balance_sheet': balance_sheet_page,
+                                               'key_ratios': key_ratios_page})
+    return {**sections['balance_sheet'], **sections['key_ratios']}
 
-    logger.info("  [LLM FALLBACK] Attempting LLM-based Key Ratios extraction...")
 
-    # Extract text from page
-    doc = fitz.open(pdf_path)
-    page = doc[page_num - 1]  # 0-indexed
-    text = page.get_text()
-    doc.close()
+def extract_many(pdf_specs: List[tuple], max_workers: int = 8) -> Dict[str, Dict[str, float]]:
+    """
+    Run the LLM fallbacks for several PDFs concurrently
+
+    The work is network-bound, so threads overlap the OpenRouter round trips;
+    the number of requests actually in flight is capped by MAX_CONCURRENT_REQUESTS.
+    pdf_parser_enhanced calls this once, from its main process, for all PDFs
+    the table parsing left incomplete.
+
+    Args:
+        pdf_specs: (pdf_path, balance_sheet_page, key_ratios_page) tuples - pass
+            None as a page number to skip that extraction
+        max_workers: Number of worker threads
 
-    # Use LLM to extract
-    extractor = LLMExtractor()
-    return extractor.extract_key_ratios(text)
+    Returns:
+        Dict of pdf_path -> extracted fields from both pages
+    """
+    results = {pdf_path: {} for pdf_path, _, _ in pdf_specs}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for pdf_path, balance_sheet_page, key_ratios_page in pdf_specs:
+            if balance_sheet_page is not None and key_ratios_page is not None:
+                # Both pages in one prompt - one round trip per PDF
+                futures.append((pdf_path, executor.submit(extract_all_llm, pdf_path, balance_sheet_page, key_ratios_page)))
+            elif balance_sheet_page is not None:
+                futures.append((pdf_path, executor.submit(extract_balance_sheet_llm, pdf_path, balance_sheet_page)))
+            elif key_ratios_page is not None:
+                futures.append((pdf_path, executor.submit(extract_key_ratios_llm, pdf_path, key_ratios_page)))
+
+        for pdf_path, future in futures:
+            results[pdf_path].update(future.result())
+
+    return results
 
 
 if __name__ == "__main__":
@@ -4,36 +4,105 @@ Main entry point that coordinates scraper and parser execution.
 """
 
 import os
+import io
 import sys
 import logging
-from datetime import datetime
+import importlib
 import subprocess
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
 
-# Create directories if they don't exist
-os.makedirs('downloads', exist_ok=True)
-os.makedirs('logs', exist_ok=True)
-os.makedirs('output', exist_ok=True)
-
-# Setup logging with timestamp
-timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'logs/orchestrator_{timestamp}.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
-def run_script(script_name, description):
+def setup_logging():
+    """Create the working directories and log to a timestamped file and the console
+
+    Called from the __main__ block only: worker processes started with the
+    spawn method re-import this module, and must not open log files of their own.
+    """
+    # Create directories if they don't exist
+    os.makedirs('downloads', exist_ok=True)
+    os.makedirs('logs', exist_ok=True)
+    os.makedirs('output', exist_ok=True)
+
+    # Setup logging with timestamp
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f'logs/orchestrator_{timestamp}.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+class _LogWriter(io.TextIOBase):
+    """File-like stdout/stderr replacement that forwards each written line to the log
+
+    print() writes a line's text and its newline in separate calls, and steps
+    print from worker threads, so partial lines are buffered per thread.
+    """
+
+    def __init__(self, prefix, level=logging.INFO):
+        self.prefix = prefix
+        self.level = level
+        self._lock = threading.Lock()
+        self._pending = {}  # thread id -> text written since its last newline
+        self._local = threading.local()
+
+    def write(self, text):
+        thread = threading.get_ident()
+        with self._lock:
+            lines = (self._pending.pop(thread, '') + text).split('\n')
+            if lines[-1]:
+                self._pending[thread] = lines[-1]
+
+        for line in lines[:-1]:
+            self._emit(line)
+        return len(text)
+
+    def finish(self):
+        """Log any unterminated lines left once the step is done"""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for line in pending:
+            self._emit(line)
+
+    def _emit(self, line):
+        if not line.strip():
+            return
+
+        # A handler that writes to the current sys.stderr (logging's last-resort
+        # handler when none is configured) would land back here
+        if getattr(self._local, 'emitting', False):
+            sys.__stderr__.write(line + '\n')
+            return
+
+        self._local.emitting = True
+        try:
+            logger.log(self.level, f"[{self.prefix}] {line}")
+        finally:
+            self._local.emitting = False
+
+
+def run_step(module_name, description, in_process=True):
     """
-    Run a Python script and capture its output.
+    Run a pipeline module's main() and log its output.
+
+    In-process steps are imported and called directly, which skips interpreter
+    startup; anything they print is forwarded to the log. Steps that start
+    their own worker processes run as a subprocess instead, so the workers'
+    output is captured with the rest of the step's.
 
     Args:
-        script_name: Name of the Python script to run
-        description: Description of what the script does
+        module_name: Name of the module to run (e.g. 'ap2_downloader')
+        description: Description of what the module does
+        in_process: Run in this process rather than as a subprocess
 
     Returns:
         bool: True if successful, False otherwise
@@ -42,8 +111,46 @@ def run_script(script_name, description):
     logger.info(f"Starting: {description}")
     logger.info("=" * 80)
 
+    if in_process:
+        success = _run_in_process(module_name)
+    else:
+        success = _run_subprocess(module_name)
+
+    if success:
+        logger.info(f"OK {description} completed successfully")
+    return success
+
+
+def _run_in_process(module_name):
+    """Import a module and call its main(), with stdout and stderr forwarded to the log"""
+    out_writer = _LogWriter(module_name)
+    err_writer = _LogWriter(module_name, logging.WARNING)  # e.g. traceback.print_exc()
+    try:
+        with redirect_stdout(out_writer), redirect_stderr(err_writer):
+            module = importlib.import_module(module_name)
+            module.main()
+        return True
+
+    except SystemExit as e:
+        # sys.exit() in a step ends that step, not the pipeline
+        if e.code in (None, 0):
+            return True
+        logger.error(f"{module_name} exited with code {e.code}")
+        return False
+
+    except Exception as e:
+        logger.exception(f"Error running {module_name}: {e}")
+        return False
+
+    finally:
+        out_writer.finish()
+        err_writer.finish()
+
+
+def _run_subprocess(module_name):
+    """Run a module as a script in a new interpreter and log its output"""
+    script_name = f"{module_name}.py"
     try:
-        # Run the script as a subprocess
         result = subprocess.run(
             [sys.executable, script_name],
             capture_output=True,
@@ -67,7 +174,6 @@ def run_script(script_name, description):
             logger.error(f"{script_name} failed with return code {result.returncode}")
             return False
 
-        logger.info(f"OK {description} completed successfully")
         return True
 
     except Exception as e:
@@ -86,7 +192,7 @@ def main():
 
     # Step 1: Run Downloader
     logger.info("\n[STEP 1/2] Running Web Scraper (Downloader)...")
-    downloader_success = run_script('ap2_downloader.py', 'Web Scraper (Download PDFs)')
+    downloader_success = run_step('ap2_downloader', 'Web Scraper (Download PDFs)')
 
     if not downloader_success:
         logger.error("=" * 80)
@@ -96,7 +202,8 @@ def main():
 
     # Step 2: Run Parser
     logger.info("\n[STEP 2/2] Running Enhanced PDF Parser...")
-    parser_success = run_script('pdf_parser_enhanced.py', 'Enhanced PDF Parser (Table Extraction)')
+    parser_success = run_step('pdf_parser_enhanced', 'Enhanced PDF Parser (Table Extraction)',
+                              in_process=False)  # Runs its own process pool
 
     if not parser_success:
         logger.error("=" * 80)
@@ -117,6 +224,7 @@ def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
     try:
         main()
     except KeyboardInterrupt:
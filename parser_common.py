@@ -0,0 +1,150 @@
+"""
+Helpers shared by the PDF parsers (pdf_parser_enhanced.py, archive/pdf_parser.py)
+Input discovery, result caching and output linking - no console or log output,
+so each parser reports in its own style
+"""
+
+import os
+import shutil
+import hashlib
+import json
+import mmap
+import re
+from datetime import datetime
+
+# Year patterns for report filenames, tried in order
+_YEAR_PATTERNS = [
+    re.compile(r'(\d{4})'),  # Any 4 digits
+    re.compile(r'AP2_(\d{4})'),  # AP2_YYYY
+    re.compile(r'Half.*?(\d{4})'),  # Half-year-Report-YYYY
+]
+
+
+def find_latest_download_folder():
+    """Most recently modified folder under downloads/, or None if there is none"""
+    # scandir entries carry their stat results, so each folder is stat'd once
+    try:
+        with os.scandir('downloads') as entries:
+            download_folders = [entry for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        return None
+
+    if not download_folders:
+        return None
+
+    return max(download_folders, key=lambda entry: entry.stat().st_mtime).path
+
+
+def list_pdf_files(folder):
+    """Paths of the PDF files directly inside a folder"""
+    with os.scandir(folder) as entries:
+        return [entry.path for entry in entries
+                if entry.name.endswith('.pdf') and entry.is_file()]
+
+
+def extract_year_from_filename(filename):
+    """Extract year from various filename patterns, defaulting to the current year"""
+    basename = os.path.basename(filename)
+
+    for pattern in _YEAR_PATTERNS:
+        match = pattern.search(basename)
+        if match:
+            year = int(match.group(1))
+            if 2000 <= year <= 2030:  # Reasonable year range
+                return year
+
+    return datetime.now().year
+
+
+def file_sha256(file_path):
+    """SHA-256 hex digest of a file
+
+    The file is memory-mapped so the hash reads straight from the page cache,
+    which the PDF libraries then reuse, instead of copying it through buffers.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()  # Empty files can't be mapped
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+def _cache_file(pdf_path, cache_dir, parser_version):
+    """Cache entry path for a PDF's contents under a parser version"""
+    key = f"{parser_version}|{file_sha256(pdf_path)}"
+    return os.path.join(cache_dir, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json")
+
+
+def load_cached_result(pdf_path, cache_dir, parser_version):
+    """Data cached for identical file contents by this parser version, or None"""
+    cache_file = _cache_file(pdf_path, cache_dir, parser_version)
+
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+
+        if cached.get('parser_version') == parser_version:
+            return cached['data']
+
+    return None
+
+
+def save_cached_result(pdf_path, data, cache_dir, parser_version, field_count):
+    """Cache a parse result if it is complete (field_count non-None fields)
+
+    Incomplete extractions are not cached so that they are retried on the next run.
+    """
+    # A None value is a field the parser (or its LLM fallback) did not find
+    if sum(value is not None for value in data.values()) != field_count:
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(_cache_file(pdf_path, cache_dir, parser_version), 'w', encoding='utf-8') as f:
+        json.dump({
+            'parser_version': parser_version,
+            'data': data,
+        }, f, indent=2)
+
+
+def parse_with_cache(pdf_path, parse, cache_dir, parser_version, field_count):
+    """Run parse(), reusing the result of an earlier run for identical file contents
+
+    Results are keyed by the SHA-256 of the PDF bytes and the parser version,
+    which is also stored with the entry. Only complete extractions are cached.
+
+    Args:
+        pdf_path: PDF being parsed
+        parse: Zero-argument callable returning the extracted data dict
+        cache_dir: Folder holding this parser's cache entries
+        parser_version: The parser's version string - bump it when parsing changes
+        field_count: Number of fields in a complete extraction
+
+    Returns:
+        Tuple of (extracted data dict, True if it came from the cache)
+    """
+    data = load_cached_result(pdf_path, cache_dir, parser_version)
+    if data is not None:
+        return data, True
+
+    data = parse()
+    save_cached_result(pdf_path, data, cache_dir, parser_version, field_count)
+
+    return data, False
+
+
+def link_latest(output_file, latest_file):
+    """Point the latest/ copy at a freshly written output file
+
+    The content is identical, so hardlink it rather than serializing twice;
+    copy where the filesystem doesn't support links.
+    """
+    try:
+        os.unlink(latest_file)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(output_file, latest_file)
+    except OSError:
+        shutil.copy2(output_file, latest_file)  # e.g. output/ on a filesystem without hardlinks
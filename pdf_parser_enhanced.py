@@ -5,67 +5,124 @@ Extracts balance sheet data with proper column alignment
 """
 
 import os
-import glob
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import fitz  # PyMuPDF
-import camelot
 from datetime import datetime
 import re
 import logging
+from functools import lru_cache
 
 import config
-from llm_extractor import extract_balance_sheet_llm, extract_key_ratios_llm
+from parser_common import (
+    extract_year_from_filename, find_latest_download_folder, link_latest, list_pdf_files,
+    load_cached_result, save_cached_result
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-print("=" * 80)
-print("AP2 PDF Parser - Enhanced Table Extraction Version")
-print("=" * 80)
+# Bump when extraction logic (including the LLM fallback) changes, so cached
+# parse results are not reused
+PARSER_VERSION = "v1"
+
+# Thousands separators and non-breaking spaces stripped from numbers in one pass
+_NUMBER_DELCHARS = str.maketrans('', '', ' ,\xa0')
+
+# Key Ratios regex fallbacks for older report layouts
+_RESULT_AMOUNT_RE = re.compile(r'(?:the\s+)?result amounted to sek ([\d.]+)', re.IGNORECASE)
+_NET_OUTFLOW_RE = re.compile(r'net outflow of sek ([\d.-]+)', re.IGNORECASE)
+
+# A page with every balance sheet indicator and no penalty cannot be beaten,
+# so the page scan stops as soon as it sees one
+_BALANCE_SHEET_PAGE_MAX_SCORE = 90
+
+# Balance sheet field patterns - flexible to match table variations
+# IMPORTANT: Check UNLISTED before LISTED to avoid substring matches
+BALANCE_SHEET_FIELD_PATTERNS = {
+    'EQUITIESANDPARTICIPATIONSUNLISTED': [r'^\s*unlisted\s*$', r'non-listed', r'equities.*unlisted'],
+    'EQUITIESANDPARTICIPATIONSLISTED': [r'^\s*listed\s*$', r'(?<!un)listed', r'equities.*listed'],
+    'BONDSANDOTHERFIXEDINCOMESECURITIES': [r'bonds.*fixed.?income', r'fixed.?income.*securities'],
+    'DERIVATIVEINSTRUMENTS': [r'^\s*derivative instruments\s*$'],
+    'CASHANDBANKBALANCES': [r'cash.*bank', r'cash and bank balances'],
+    'OTHERASSETS': [r'^\s*other assets\s*$', r'other assets(?!\w)'],
+    'PREPAIDEXPENSESANDACCRUEDINCOME': [r'prepaid.*accrued.*income'],
+    'TOTALASSETS': [r'^\s*total\s+assets\s*$', r'total assets(?!\w)'],
+    'DERIVATIVEINSTRUMENTSLIABILITIES': [r'^\s*derivative instruments\s*$'],  # Context-aware
+    'OTHERLIABILITIES': [r'^\s*other liabilities\s*$', r'other liabilities(?!\w)'],
+    'DEFERREDINCOMEANDACCRUEDEXPENSES': [r'deferred.*accrued.*expenses', r'deferred income.*accrued'],
+    'TOTALLIABILITIES': [r'^\s*total liabilities\s*$', r'total liabilities(?!\w)'],
+    'FUNDCAPITALCARRIEDFORWARD': [r'fund capital carried forward', r'carried.*forward'],
+    'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM': [r'net.*national pension', r'net payments.*pension'],
+    'NETRESULTFORTHEPERIOD': [r'net result.*period'],
+    'TOTALFUNDCAPITAL': [r'^\s*total fund capital\s*$', r'total fund capital(?!\w)'],
+    'TOTALFUNDCAPITALANDLIABILITIES': [r'total fund capital and liabilities', r'total.*capital.*liabilities']
+}
+
+# Compiled once at import - each field's alternatives are fused into a single
+# alternation so a table row costs one regex scan per field instead of one per pattern
+_FIELD_PATTERNS = {
+    field_key: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+    for field_key, patterns in BALANCE_SHEET_FIELD_PATTERNS.items()
+}
+
+
+def _header_field_name(header):
+    """Map an output header to its extracted field name
+
+    e.g., 'AP2.EQUITIESANDPARTICIPATIONSLISTED.FLOW.NONE.H.1@AP2' -> 'EQUITIESANDPARTICIPATIONSLISTED'
+    e.g., 'AP2.FUNDCAPITALCARRIEDFORWARD.LEVEL.NONE.H.1@AP2' -> 'FUNDCAPITALCARRIEDFORWARDLEVEL'
+    """
+    parts = header.split('.')
+    if len(parts) >= 3 and parts[2] == 'LEVEL':
+        return parts[1] + 'LEVEL'
+    return parts[1] if len(parts) >= 2 else None
 
 
-def find_latest_download_folder():
-    """Find the most recent download folder"""
-    download_folders = glob.glob('downloads/*')
-    if not download_folders:
-        logger.error("No download folders found")
-        return None
+# Output header -> field name, resolved once instead of per year and header
+_HEADER_TO_FIELD = {header: _header_field_name(header) for header in config.OUTPUT_HEADERS[1:]}
+
 
-    latest_folder = max(download_folders, key=os.path.getmtime)
-    logger.info(f"Processing folder: {latest_folder}")
-    return latest_folder
+@lru_cache(maxsize=4)
+def _open_pdf(pdf_path, mtime):
+    """Document held open for page text lookups - mtime is part of the key so edited files are reopened"""
+    return fitz.open(pdf_path)
 
 
-def extract_year_from_filename(filename):
-    """Extract year from various filename patterns"""
-    basename = os.path.basename(filename)
+@lru_cache(maxsize=256)
+def _page_text(pdf_path, mtime, page_index):
+    """Lower-cased text of one page, extracted on first use"""
+    return _open_pdf(pdf_path, mtime)[page_index].get_text().lower()
 
-    patterns = [
-        r'(\d{4})',  # Any 4 digits
-        r'AP2_(\d{4})',  # AP2_YYYY
-        r'Half.*?(\d{4})',  # Half-year-Report-YYYY
-    ]
 
-    for pattern in patterns:
-        match = re.search(pattern, basename)
-        if match:
-            year = int(match.group(1))
-            if 2000 <= year <= 2030:
-                return year
+def pdf_page_count(pdf_path):
+    """Number of pages in a PDF"""
+    return len(_open_pdf(pdf_path, os.path.getmtime(pdf_path)))
 
-    return datetime.now().year
+
+def pdf_page_text(pdf_path, page_index):
+    """Lower-cased text of a page (0-indexed), shared by the page searches below
+
+    Pages are extracted only when a search reaches them, so a search that
+    stops early never pays for the rest of the document.
+    """
+    return _page_text(pdf_path, os.path.getmtime(pdf_path), page_index)
 
 
 def find_balance_sheet_page_fitz(pdf_path):
-    """Find balance sheet page using PyMuPDF"""
-    doc = fitz.open(pdf_path)
+    """Find balance sheet page using PyMuPDF
+
+    Pages are scanned from the middle of the report outwards, where the
+    financial statements usually sit, so the full-score page is found early.
+    """
+    page_count = pdf_page_count(pdf_path)
     best_page = None
     best_score = 0
 
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text().lower()
+    middle = page_count // 2
+    for page_num in sorted(range(page_count), key=lambda i: abs(i - middle)):
+        text = pdf_page_text(pdf_path, page_num)
 
         score = 0
 
@@ -93,7 +150,8 @@ def find_balance_sheet_page_fitz(pdf_path):
             best_score = score
             best_page = page_num + 1  # 1-indexed
 
-    doc.close()
+            if best_score >= _BALANCE_SHEET_PAGE_MAX_SCORE:
+                break
 
     if best_page and best_score >= 30:
         return best_page
@@ -119,7 +177,7 @@ def clean_number_string(value_str, allow_decimal=False):
         return None
 
     # Remove spaces and non-breaking spaces, keep decimal points
-    cleaned = value_str.replace(' ', '').replace(',', '').replace('\xa0', '')
+    cleaned = value_str.translate(_NUMBER_DELCHARS)
 
     # Check if it has a decimal point
     has_decimal = '.' in cleaned
@@ -138,6 +196,8 @@ def clean_number_string(value_str, allow_decimal=False):
 
 def extract_balance_sheet_with_camelot(pdf_path, page_num):
     """Extract balance sheet table using Camelot"""
+    import camelot  # Heavy import (OpenCV, Ghostscript) - deferred until a table is needed
+
     logger.info(f"  Attempting Camelot extraction on page {page_num}...")
 
     try:
@@ -273,34 +333,34 @@ def extract_balance_sheet_with_pymupdf(pdf_path, page_num):
 def extract_key_ratios(pdf_path):
     """Extract Key Ratios data (Fund capital carried forward, Net outflows, Net result)
 
-    Returns dict with:
+    Returns tuple of (dict, Key Ratios page number or None), the dict with:
         - FUNDCAPITALCARRIEDFORWARDLEVEL: Fund capital in billions (458.0)
         - NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM: Net outflows in billions (-2.4)
         - TOTAL: Net result for the year in billions (1.6)
     """
     logger.info("\n  Extracting Key Ratios data...")
 
-    try:
-        # Find Key Ratios page
-        doc = fitz.open(pdf_path)
-        key_ratios_page = None
+    # Find Key Ratios page
+    key_ratios_page = None
+    key_ratios_text = ""
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text().lower()
+    try:
 
+        for page_num in range(pdf_page_count(pdf_path)):
+            text = pdf_page_text(pdf_path, page_num)
             if 'key ratios' in text or 'key ratio' in text:
                 key_ratios_page = page_num + 1
+                key_ratios_text = text  # Kept for the regex fallback below
                 logger.info(f"  Found Key Ratios on page {key_ratios_page}")
                 break
 
-        doc.close()
-
         if not key_ratios_page:
             logger.warning("  Key Ratios page not found")
-            return {}
+            return {}, None
 
         # Extract table using Camelot
+        import camelot
+
         tables = camelot.read_pdf(pdf_path, pages=str(key_ratios_page), flavor='lattice')
 
         if len(tables) == 0:
@@ -315,7 +375,7 @@ def extract_key_ratios(pdf_path):
 
         if len(tables) == 0:
             logger.warning("  No tables found on Key Ratios page")
-            return {}
+            return {}, key_ratios_page
 
         df = tables[0].df
         logger.info(f"  Key Ratios table shape: {df.shape}")
@@ -358,19 +418,12 @@ def extract_key_ratios(pdf_path):
         # If table parsing fails, try regex on raw text as a fallback for older years
         if len(data) < 3:
             logger.info("  Table parsing for Key Ratios failed, trying regex fallback...")
-            page_text = ""
-            try:
-                doc = fitz.open(pdf_path)
-                page = doc[key_ratios_page - 1]
-                page_text = page.get_text().lower()
-                doc.close()
-            except Exception as e:
-                logger.warning(f"    Could not get page text for regex fallback: {e}")
+            page_text = key_ratios_text
 
             if page_text:
                 # Regex for: "The result amounted to SEK 19.4 billion"
                 if 'TOTAL' not in data:
-                    match = re.search(r'(?:the\s+)?result amounted to sek ([\d.]+)', page_text, re.IGNORECASE)
+                    match = _RESULT_AMOUNT_RE.search(page_text)
                     if match:
                         value = clean_number_string(match.group(1), allow_decimal=True)
                         if value is not None:
@@ -379,7 +432,7 @@ def extract_key_ratios(pdf_path):
 
                 # Regex for: "net outflow of SEK -2.6 (-2.0) billion"
                 if 'NETOUTFLOWSTOTHENATIONALPENSIONSYSTEM' not in data:
-                    match = re.search(r'net outflow of sek ([\d.-]+)', page_text, re.IGNORECASE)
+                    match = _NET_OUTFLOW_RE.search(page_text)
                     if match:
                         value = clean_number_string(match.group(1), allow_decimal=True)
                         if value is not None:
@@ -389,36 +442,12 @@ def extract_key_ratios(pdf_path):
                 # REMOVED problematic regex for fund capital that was picking wrong column
                 # LLM extraction is more reliable for multi-column tables (e.g., 2020 format)
 
-        # LLM fallback if we still have missing fields
-        if len(data) < 3:
-            missing_count = 3 - len(data)
-            logger.info(f"  Trying LLM fallback for missing {missing_count} Key Ratios fields...")
-
-            # Find key ratios page again for LLM
-            doc = fitz.open(pdf_path)
-            key_ratios_page_for_llm = None
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text().lower()
-                if 'key ratios' in text or 'key ratio' in text:
-                    key_ratios_page_for_llm = page_num + 1
-                    break
-            doc.close()
-
-            if key_ratios_page_for_llm:
-                llm_data = extract_key_ratios_llm(pdf_path, key_ratios_page_for_llm)
-
-                # Merge LLM data (fill missing fields only)
-                for key, value in llm_data.items():
-                    if key not in data:
-                        data[key] = value
-
         logger.info(f"    [INFO] Extracted {len(data)}/3 Key Ratios fields")
-        return data
+        return data, key_ratios_page
 
     except Exception as e:
         logger.error(f"  Key Ratios extraction failed: {e}")
-        return {}
+        return {}, key_ratios_page
 
 
 def parse_balance_sheet_from_table(df):
@@ -437,28 +466,6 @@ def parse_balance_sheet_from_table(df):
 
     logger.info(f"  Parsing table with shape: {df.shape}")
 
-    # Field mapping patterns - flexible to match table variations
-    # IMPORTANT: Check UNLISTED before LISTED to avoid substring matches
-    field_patterns = {
-        'EQUITIESANDPARTICIPATIONSUNLISTED': [r'^\s*unlisted\s*$', r'non-listed', r'equities.*unlisted'],
-        'EQUITIESANDPARTICIPATIONSLISTED': [r'^\s*listed\s*$', r'(?<!un)listed', r'equities.*listed'],
-        'BONDSANDOTHERFIXEDINCOMESECURITIES': [r'bonds.*fixed.?income', r'fixed.?income.*securities'],
-        'DERIVATIVEINSTRUMENTS': [r'^\s*derivative instruments\s*$'],
-        'CASHANDBANKBALANCES': [r'cash.*bank', r'cash and bank balances'],
-        'OTHERASSETS': [r'^\s*other assets\s*$', r'other assets(?!\w)'],
-        'PREPAIDEXPENSESANDACCRUEDINCOME': [r'prepaid.*accrued.*income'],
-        'TOTALASSETS': [r'^\s*total\s+assets\s*$', r'total assets(?!\w)'],
-        'DERIVATIVEINSTRUMENTSLIABILITIES': [r'^\s*derivative instruments\s*$'],  # Context-aware
-        'OTHERLIABILITIES': [r'^\s*other liabilities\s*$', r'other liabilities(?!\w)'],
-        'DEFERREDINCOMEANDACCRUEDEXPENSES': [r'deferred.*accrued.*expenses', r'deferred income.*accrued'],
-        'TOTALLIABILITIES': [r'^\s*total liabilities\s*$', r'total liabilities(?!\w)'],
-        'FUNDCAPITALCARRIEDFORWARD': [r'fund capital carried forward', r'carried.*forward'],
-        'NETPAYMENTSTOTHENATIONALPENSIONSYSTEM': [r'net.*national pension', r'net payments.*pension'],
-        'NETRESULTFORTHEPERIOD': [r'net result.*period'],
-        'TOTALFUNDCAPITAL': [r'^\s*total fund capital\s*$', r'total fund capital(?!\w)'],
-        'TOTALFUNDCAPITALANDLIABILITIES': [r'total fund capital and liabilities', r'total.*capital.*liabilities']
-    }
-
     data = {}
     in_assets_section = True  # Start in assets
     assets_found = False
@@ -487,18 +494,12 @@ def parse_balance_sheet_from_table(df):
 
         # Try to match field patterns
         field_matched = False
-        for field_key, patterns in field_patterns.items():
+        for field_key, pattern in _FIELD_PATTERNS.items():
             # Skip if already extracted this field
             if field_key in data:
                 continue
 
-            matched = False
-            for pattern in patterns:
-                if re.search(pattern, field_name, re.IGNORECASE):
-                    matched = True
-                    break
-
-            if not matched:
+            if not pattern.search(field_name):
                 continue
 
             # Context validation for derivative instruments
@@ -515,7 +516,7 @@ def parse_balance_sheet_from_table(df):
                     data[field_key] = value
                     logger.info(f"    [OK] {field_key}: {value:,}")
                     field_matched = True
-                    break  # Break out of field_patterns loop
+                    break  # Break out of _FIELD_PATTERNS loop
 
         # Move to next row if we matched this row
         if field_matched:
@@ -528,7 +529,15 @@ def parse_balance_sheet_from_table(df):
 
 
 def parse_balance_sheet_adaptive(pdf_path, year):
-    """Parse balance sheet using multiple extraction methods"""
+    """Parse balance sheet using multiple extraction methods
+
+    The LLM fallback is not run here - this runs in a worker process - but
+    left to main(), which runs it for all PDFs at once.
+
+    Returns:
+        Tuple of (extracted data dict, (balance sheet page, Key Ratios page)),
+        each page None unless the LLM fallback should fill fields from it
+    """
     logger.info(f"\nProcessing: {os.path.basename(pdf_path)} (Year: {year})")
 
     # Step 1: Find balance sheet page
@@ -536,7 +545,7 @@ def parse_balance_sheet_adaptive(pdf_path, year):
 
     if not page_num:
         logger.error("  Could not find balance sheet page")
-        return {}
+        return {}, (None, None)
 
     logger.info(f"  Found balance sheet on page {page_num}")
 
@@ -553,35 +562,58 @@ def parse_balance_sheet_adaptive(pdf_path, year):
     if df is not None:
         data = parse_balance_sheet_from_table(df)
 
-    # Step 5: LLM fallback if traditional methods failed or incomplete
+    # Step 5: Leave missing fields to the LLM fallback
+    balance_sheet_llm_page = None
     if len(data) < 17:  # Less than 17 Balance Sheet fields
-        missing_count = 17 - len(data)
         if len(data) == 0:
             logger.warning("  All table extraction methods failed")
         else:
             logger.warning(f"  Table extraction incomplete ({len(data)}/17 fields)")
 
-        logger.info(f"  Trying LLM fallback for missing {missing_count} fields...")
-        llm_data = extract_balance_sheet_llm(pdf_path, page_num)
+        logger.info(f"  Leaving missing {17 - len(data)} fields to the LLM fallback")
+        balance_sheet_llm_page = page_num
 
-        # Merge LLM data (LLM fills missing fields, doesn't override existing ones)
-        for key, value in llm_data.items():
-            if key not in data:
-                data[key] = value
+    # Step 6: Extract Key Ratios data
+    key_ratios_data, key_ratios_page = extract_key_ratios(pdf_path)
 
-    # Step 5: Extract Key Ratios data
-    key_ratios_data = extract_key_ratios(pdf_path)
+    key_ratios_llm_page = None
+    if len(key_ratios_data) < 3 and key_ratios_page:
+        logger.info(f"  Leaving missing {3 - len(key_ratios_data)} Key Ratios fields to the LLM fallback")
+        key_ratios_llm_page = key_ratios_page
 
-    # Step 6: Merge Key Ratios into main data
+    # Step 7: Merge Key Ratios into main data
     data.update(key_ratios_data)
 
-    # Step 7: Validate
-    if data:
-        validate_balance_sheet(data)
+    return data, (balance_sheet_llm_page, key_ratios_llm_page)
 
-    logger.info(f"\n  [FINAL] Extracted {len(data)}/20 total fields (17 balance sheet + 3 key ratios)")
 
-    return data
+def fill_missing_with_llm(pdf_files, results):
+    """Run the LLM fallback for every PDF with missing fields, from this process
+
+    All requests go through llm_extractor.extract_many, so they share its
+    request limit however many worker processes did the table parsing.
+
+    Args:
+        pdf_files: PDF paths, in the same order as results
+        results: (year, data, llm_pages) tuples from parse_pdf_file - data is
+            filled in place, fields from the tables taking precedence
+    """
+    pdf_specs = [(pdf_file, *llm_pages)
+                 for pdf_file, (_, _, llm_pages) in zip(pdf_files, results)
+                 if llm_pages and any(llm_pages)]
+    if not pdf_specs:
+        return
+
+    logger.info(f"\nRunning LLM fallback for {len(pdf_specs)} PDF(s)...")
+    from llm_extractor import extract_many  # Only loaded when the fallback is needed
+
+    llm_results = extract_many(pdf_specs)
+
+    for pdf_file, (_, data, _) in zip(pdf_files, results):
+        # Merge LLM data (LLM fills missing fields, doesn't override existing ones)
+        for key, value in llm_results.get(pdf_file, {}).items():
+            if key not in data:
+                data[key] = value
 
 
 def validate_balance_sheet(data):
@@ -614,40 +646,62 @@ def validate_balance_sheet(data):
         logger.info(f"    [INFO] Validation: {validations_passed}/{total_validations} checks passed")
 
 
-def create_output(all_data):
-    """Create Excel output matching sample structure"""
-    logger.info(f"\n{'='*80}")
-    logger.info("CREATING OUTPUT")
-    logger.info(f"{'='*80}")
+def write_xlsx(output_file, df):
+    """Write the output workbook with 2 header rows (technical + sub-headers)
 
-    # Create DataFrame
-    df_data = []
+    Rows are streamed rather than held as a cell grid: openpyxl in write-only
+    mode for the usual handful of years, xlsxwriter in constant-memory mode
+    (which flushes each row as it goes) for very large outputs.
+    """
+    # Row 1: Technical headers (first column should be None, not 'Unnamed: 0')
+    header_row = tuple(None if header == 'Unnamed: 0' else header
+                       for header in config.OUTPUT_HEADERS)
+    # Row 2: Human-readable sub-headers
+    subheader_row = config.OUTPUT_SUBHEADERS
+    # Row 3+: Data
+    data_rows = df.itertuples(index=False, name=None)
 
-    for year, data in all_data.items():
-        row = {'Unnamed: 0': year}
+    if len(df) > config.OUTPUT_CONFIG['xlsxwriter_min_rows']:
+        import xlsxwriter
 
-        # Map extracted fields to output headers
-        for header in config.OUTPUT_HEADERS[1:]:
-            value = None
+        wb = xlsxwriter.Workbook(output_file, {'constant_memory': True, 'strings_to_numbers': False})
+        ws = wb.add_worksheet()
 
-            # Extract field name from header
-            # e.g., 'AP2.EQUITIESANDPARTICIPATIONSLISTED.FLOW.NONE.H.1@AP2' -> 'EQUITIESANDPARTICIPATIONSLISTED'
-            # e.g., 'AP2.FUNDCAPITALCARRIEDFORWARD.LEVEL.NONE.H.1@AP2' -> 'FUNDCAPITALCARRIEDFORWARDLEVEL'
-            parts = header.split('.')
-            if len(parts) >= 2:
-                # Check if this is the special LEVEL column
-                if len(parts) >= 3 and parts[2] == 'LEVEL':
-                    field_name = parts[1] + 'LEVEL'
-                else:
-                    field_name = parts[1]
+        # constant_memory requires rows to be written in increasing order
+        ws.write_row(0, 0, header_row)
+        ws.write_row(1, 0, subheader_row)
+        for row_idx, row in enumerate(data_rows, start=2):
+            ws.write_row(row_idx, 0, row)
 
-                value = data.get(field_name)
+        wb.close()
+        return
+
+    import openpyxl
 
-            row[header] = value
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
 
-        df_data.append(row)
+    ws.append(header_row)
+    ws.append(subheader_row)
+    for row in data_rows:
+        ws.append(row)
 
-    df = pd.DataFrame(df_data, columns=config.OUTPUT_HEADERS)
+    wb.save(output_file)
+
+
+def create_output(all_data):
+    """Create Excel output matching sample structure"""
+    logger.info(f"\n{'='*80}")
+    logger.info("CREATING OUTPUT")
+    logger.info(f"{'='*80}")
+
+    # One row per year, columns ordered and renamed to the output headers
+    df = pd.DataFrame.from_dict(all_data, orient='index')
+    df = df.reindex(columns=list(_HEADER_TO_FIELD.values()))
+    df.columns = list(_HEADER_TO_FIELD.keys())
+    df = df.astype(object).where(df.notna(), None)
+    df.insert(0, 'Unnamed: 0', df.index)
+    df = df.reset_index(drop=True)
 
     # Create output folders
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -657,36 +711,42 @@ def create_output(all_data):
     os.makedirs(output_folder, exist_ok=True)
     os.makedirs(latest_folder, exist_ok=True)
 
-    # Save files with 2 header rows (technical + sub-headers)
-    output_file = os.path.join(output_folder, f'AP2_Financial_Data_{timestamp}.xlsx')
-    latest_file = os.path.join(latest_folder, 'AP2_Financial_Data_latest.xlsx')
+    output_file = None
 
-    # Save with custom header structure using openpyxl
-    import openpyxl
-    from openpyxl.utils.dataframe import dataframe_to_rows
+    if config.OUTPUT_CONFIG['write_xlsx']:
+        # Save files with 2 header rows (technical + sub-headers)
+        output_file = os.path.join(output_folder, f'AP2_Financial_Data_{timestamp}.xlsx')
+        latest_file = os.path.join(latest_folder, 'AP2_Financial_Data_latest.xlsx')
 
-    for file_path in [output_file, latest_file]:
-        wb = openpyxl.Workbook()
-        ws = wb.active
+        write_xlsx(output_file, df)
+        link_latest(output_file, latest_file)
 
-        # Row 1: Technical headers (first column should be None, not 'Unnamed: 0')
-        for col_idx, header in enumerate(config.OUTPUT_HEADERS, start=1):
-            value = None if header == 'Unnamed: 0' else header
-            ws.cell(row=1, column=col_idx, value=value)
+        logger.info(f"✓ Saved: {output_file}")
+        logger.info(f"✓ Saved: {latest_file}")
 
-        # Row 2: Human-readable sub-headers
-        for col_idx, subheader in enumerate(config.OUTPUT_SUBHEADERS, start=1):
-            ws.cell(row=2, column=col_idx, value=subheader)
+    if config.OUTPUT_CONFIG['write_parquet']:
+        # Columnar copy for analytics - technical headers only, no sub-header row
+        parquet_file = os.path.join(output_folder, f'AP2_Financial_Data_{timestamp}.parquet')
+        latest_parquet = os.path.join(latest_folder, 'AP2_Financial_Data_latest.parquet')
 
-        # Row 3+: Data
-        for row_idx, (_, row_data) in enumerate(df.iterrows(), start=3):
-            for col_idx, value in enumerate(row_data, start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+        # Value columns hold mixed ints, floats, None and the odd string from a
+        # fallback - parquet needs one type per column
+        parquet_df = df.copy()
+        value_columns = parquet_df.columns[1:]
+        parquet_df[value_columns] = parquet_df[value_columns].apply(pd.to_numeric, errors='coerce')
 
-        wb.save(file_path)
+        parquet_df.to_parquet(
+            parquet_file,
+            engine='pyarrow',
+            compression=config.OUTPUT_CONFIG['parquet_compression'],
+            index=False
+        )
+        link_latest(parquet_file, latest_parquet)
+
+        logger.info(f"✓ Saved: {parquet_file}")
+        logger.info(f"✓ Saved: {latest_parquet}")
 
-    logger.info(f"✓ Saved: {output_file}")
-    logger.info(f"✓ Saved: {latest_file}")
+        output_file = output_file or parquet_file
 
     # Calculate accuracy
     filled_count = df.notna().sum().sum() - len(df)
@@ -705,28 +765,67 @@ def create_output(all_data):
     return output_file
 
 
+def parse_pdf_file(pdf_file):
+    """Parse a single PDF - runs in a worker process
+
+    Returns:
+        Tuple of (year, extracted data dict, llm_pages) - llm_pages is None for a
+        result reused from an earlier run for identical file contents, else the
+        pages from parse_balance_sheet_adaptive
+    """
+    year = extract_year_from_filename(pdf_file)
+
+    if config.PDF_PARSING['use_cache']:
+        data = load_cached_result(pdf_file, config.CACHE_DIR, PARSER_VERSION)
+        if data is not None:
+            logger.info(f"\nUsing cached result for {os.path.basename(pdf_file)} (Year: {year})")
+            return year, data, None
+
+    data, llm_pages = parse_balance_sheet_adaptive(pdf_file, year)
+    return year, data, llm_pages
+
+
 def main():
     """Main execution"""
+    print("=" * 80)
+    print("AP2 PDF Parser - Enhanced Table Extraction Version")
+    print("=" * 80)
+
     try:
         # Find latest download folder
         download_folder = find_latest_download_folder()
         if not download_folder:
+            logger.error("No download folders found")
             return
+        logger.info(f"Processing folder: {download_folder}")
 
         # Find PDFs
-        pdf_files = glob.glob(os.path.join(download_folder, '*.pdf'))
+        pdf_files = list_pdf_files(download_folder)
         logger.info(f"Found {len(pdf_files)} PDF file(s)\n")
 
         if not pdf_files:
             logger.error("No PDF files found")
             return
 
-        # Process each PDF
+        # Process PDFs in parallel - each one is independent and CPU-bound
         all_data = {}
+        max_workers = min(len(pdf_files), config.PDF_PARSING['max_workers'] or os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(parse_pdf_file, pdf_files))
+
+        # LLM fallback for fields the tables didn't give
+        fill_missing_with_llm(pdf_files, results)
+
+        for pdf_file, (year, data, llm_pages) in zip(pdf_files, results):
+            if llm_pages is not None:  # Parsed in this run rather than reused
+                if data:
+                    validate_balance_sheet(data)
+                logger.info(f"  [FINAL] {year}: {len(data)}/20 total fields (17 balance sheet + 3 key ratios)")
 
-        for pdf_file in pdf_files:
-            year = extract_year_from_filename(pdf_file)
-            data = parse_balance_sheet_adaptive(pdf_file, year)
+                if config.PDF_PARSING['use_cache']:
+                    save_cached_result(pdf_file, data, config.CACHE_DIR, PARSER_VERSION,
+                                       len(config.OUTPUT_HEADERS) - 1)
 
             if data:
                 all_data[year] = data
@@ -750,9 +849,7 @@ def main():
         logger.info(f"{'='*80}")
 
     except Exception as e:
-        logger.error(f"\n[FATAL ERROR] {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n[FATAL ERROR] {e}")
         raise
 
 
@@ -0,0 +1,23 @@
+"""
+Runner for the plain-script test files (test_archive_parser.py, test_llm_extractor.py,
+test_pdf_parser_enhanced.py) - each ends with run_tests(globals())
+"""
+import sys
+
+
+def run_tests(namespace):
+    """Run every test_* function in a module's namespace, then exit with 1 if any failed"""
+    tests = [(name, test) for name, test in namespace.items()
+             if name.startswith('test_') and callable(test)]
+
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"PASSED: {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAILED: {name} {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,56 @@
+"""
+Regression tests for the archive adaptive parser (archive/pdf_parser.py)
+Runs the parser on the sample reports in 'project information/'
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# archive/pdf_parser.py imports config from the project root
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'archive'))
+
+import fitz  # PyMuPDF
+import pdf_parser
+from run_tests import run_tests
+
+SAMPLES_DIR = os.path.join(ROOT, 'project information')
+
+
+def test_rotated_balance_sheet_page():
+    """The 2022 balance sheet page is rotated 90 degrees - rows must follow the displayed orientation"""
+    pdf_path = os.path.join(SAMPLES_DIR, 'Half-year-Report-2022.pdf')
+
+    with fitz.open(pdf_path) as doc:
+        page_num, page, text = pdf_parser.find_balance_sheet_page(doc)
+        assert page.rotation == 90, "sample page is expected to be rotated"
+        assert 'Listed\t159 312\t187 888\t195 375' in text.split('\n')
+
+    data = pdf_parser.parse_balance_sheet_adaptive(pdf_path, 2022)
+
+    assert len(data) == 17
+    assert data['EQUITIESANDPARTICIPATIONSLISTED'] == 159312
+    assert data['DERIVATIVEINSTRUMENTS'] == 2144
+    assert data['DERIVATIVEINSTRUMENTSLIABILITIES'] == 8968
+    assert data['TOTALASSETS'] == data['TOTALFUNDCAPITALANDLIABILITIES'] == 423655
+
+
+def test_income_statement_on_balance_sheet_page():
+    """The 2020 page opens with the income statement - its look-alike lines must not fill asset fields"""
+    pdf_path = os.path.join(SAMPLES_DIR, 'half-year-report-2020.pdf')
+
+    data = pdf_parser.parse_balance_sheet_adaptive(pdf_path, 2020)
+
+    # Income statement: "Net result, derivative instruments -2 158" and
+    # "Net result, listed equities and participations -14 162"
+    assert data['DERIVATIVEINSTRUMENTS'] == 6997
+    assert data['EQUITIESANDPARTICIPATIONSLISTED'] == 152705
+    assert data['EQUITIESANDPARTICIPATIONSUNLISTED'] == 78334
+    assert data['DERIVATIVEINSTRUMENTSLIABILITIES'] == 2188
+    assert data['NETRESULTFORTHEPERIOD'] == -19262
+    assert data['TOTALASSETS'] == data['TOTALFUNDCAPITALANDLIABILITIES'] == 362451
+
+
+if __name__ == "__main__":
+    run_tests(globals())
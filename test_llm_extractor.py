@@ -0,0 +1,73 @@
+"""
+Offline tests for the LLM extractor's regex fast path and concurrent entry point
+The OpenRouter call is replaced by a canned reply - no API key or network needed
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import llm_extractor
+from run_tests import run_tests
+
+# Balance Sheet page the regex fast path reads completely
+with open(os.path.join(ROOT, 'archive', '2020_balance_sheet_text.txt'), encoding='utf-8') as f:
+    CLEAN_BALANCE_SHEET = f.read()
+
+
+def make_extractor(reply):
+    """Enabled extractor whose LLM call returns reply(prompt)"""
+    extractor = llm_extractor.LLMExtractor()
+    extractor.enabled = True
+    extractor._call_llm = lambda prompt, response_format=None: reply(prompt)
+    return extractor
+
+
+def test_regex_rejects_line_items_off_their_total():
+    """A line item that picked up the wrong number leaves the page to the LLM even though the totals balance"""
+    assert llm_extractor.extract_balance_sheet_regex(CLEAN_BALANCE_SHEET) is not None
+
+    # The income statement's "Net result, derivative instruments" instead of the asset line
+    wrong_derivatives = CLEAN_BALANCE_SHEET.replace('6 997', '-2 158', 1)
+
+    assert llm_extractor.extract_balance_sheet_regex(wrong_derivatives) is None
+
+
+def test_null_fields_dropped():
+    """Rows the strict schema reports as null are left out rather than returned as None"""
+    extractor = make_extractor(lambda prompt: '{"TOTALASSETS": 362451, "OTHERASSETS": null}')
+
+    result = extractor.extract_balance_sheet('unreadable page')
+
+    assert result == {'TOTALASSETS': 362451}
+
+
+def test_extract_many():
+    """Each PDF gets the combined or single-page fallback matching the pages it has"""
+    originals = (llm_extractor.extract_all_llm, llm_extractor.extract_balance_sheet_llm,
+                 llm_extractor.extract_key_ratios_llm)
+    llm_extractor.extract_all_llm = lambda path, bs_page, kr_page: {'ALL': (bs_page, kr_page)}
+    llm_extractor.extract_balance_sheet_llm = lambda path, page: {'BS': page}
+    llm_extractor.extract_key_ratios_llm = lambda path, page: {'KR': page}
+    try:
+        results = llm_extractor.extract_many([
+            ('a.pdf', 5, 3),
+            ('b.pdf', 6, None),
+            ('c.pdf', None, 2),
+            ('d.pdf', None, None),
+        ])
+    finally:
+        (llm_extractor.extract_all_llm, llm_extractor.extract_balance_sheet_llm,
+         llm_extractor.extract_key_ratios_llm) = originals
+
+    assert results == {
+        'a.pdf': {'ALL': (5, 3)},
+        'b.pdf': {'BS': 6},
+        'c.pdf': {'KR': 2},
+        'd.pdf': {},
+    }
+
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,49 @@
+"""
+Tests for the enhanced parser's output files (pdf_parser_enhanced.create_output)
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+import config
+import pdf_parser_enhanced
+from run_tests import run_tests
+
+
+def test_parquet_round_trip():
+    """Mixed int/float/None/'' values must write to parquet and read back as numbers"""
+    field_headers = {field: header for header, field in pdf_parser_enhanced._HEADER_TO_FIELD.items()}
+    level, total = 'FUNDCAPITALCARRIEDFORWARDLEVEL', 'TOTALFUNDCAPITALANDLIABILITIES'
+    level_header, total_header = field_headers[level], field_headers[total]
+
+    all_data = {
+        2020: {level: 357.9, total: 362451},
+        2021: {level: '1.5', total: ''},
+        2022: {total: 423655.0},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            pdf_parser_enhanced.create_output(all_data)
+            df = pd.read_parquet(os.path.join('output', 'latest', 'AP2_Financial_Data_latest.parquet'))
+        finally:
+            os.chdir(cwd)
+
+    assert list(df.columns) == list(config.OUTPUT_HEADERS)
+    assert df['Unnamed: 0'].tolist() == [2020, 2021, 2022]
+    assert df[total_header].tolist()[0] == 362451
+    assert pd.isna(df[total_header].tolist()[1])
+    assert df[total_header].tolist()[2] == 423655
+    assert df[level_header].tolist()[:2] == [357.9, 1.5]
+    assert pd.isna(df[level_header].tolist()[2])
+
+
+if __name__ == "__main__":
+    run_tests(globals())